@@ -1,27 +1,28 @@
 import os
+import json
 import uuid
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-import zipfile
-import magic
 
+from scripts.ingest import stream_upload_to_disk, UploadTooLarge, IngestedFile
+from scripts.download_index import DownloadIndex
+from scripts.expiry import ExpiryStore, delete_path
+from scripts.zip_stream import iter_zip, zip_entries
+from scripts.thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_ZOOM, MAX_THUMBNAIL_ZOOM, thumbnail_path
+from scripts.page_ranges import parse_page_range
+from scripts.pdf_split import SPLIT_MODES
 # Aspose modules are isolated in subprocesses using venv_words and venv_slides
-from scripts.converter_image import convert_image_to_pdf
-from scripts.pdf_tools import (
-    merge_pdfs, split_pdf, compress_pdf, rotate_pdf, watermark_pdf,
-    pdf_to_images, encrypt_pdf, decrypt_pdf
-)
+from scripts.tasks import (run_task_in_worker, run_in_task_daemon, converter_health, shutdown_daemon_pools, get_result_cache, TASK_WORKERS,
+                          CONVERT_FILE_CONCURRENCY)
+from scripts.job_queue import init_queue, enqueue_job, get_job, purge_finished_jobs
+from scripts.job_worker import start_workers, stop_workers, restart_dead_workers
 
-def validate_file_type(file_bytes: bytes, expected_ext: str = None) -> str:
-    """
-    Validates file type using python-magic.
-    Raises HTTPException if invalid. Returns the mime type.
-    """
-    mime_type = magic.from_buffer(file_bytes, mime=True)
-    
+def validate_mime_type(mime_type: str) -> str:
     # Generic security check for risky files
     risky_mimes = ['application/x-executable', 'application/x-sh', 'application/x-bat']
     if mime_type in risky_mimes:
@@ -45,51 +46,316 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(CONVERTED_DIR, exist_ok=True)
 
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20 MB
+MAX_BATCH_PREVIEW_FILES = 50
+# /upload/ PDF -> PPTX slide images (mirrors scripts/converter_pptx.py, which runs in venv_slides)
+SLIDE_IMAGE_FORMATS = ("jpg", "png")
+MIN_SLIDE_DPI, MAX_SLIDE_DPI = 36, 300
+MIN_IMAGE_SIDE = 64  # smallest image_max_side accepted for images -> PDF downscaling
+# /convert/excel/ output formats: format -> (stored file extension, download name suffix)
+TABLE_OUTPUTS = {"xlsx": (".xlsx", ".xlsx"), "csv": (".zip", "_tables.zip"), "parquet": (".parquet", ".parquet")}
+RESULT_TTL = 600  # results are deleted 10 minutes after they are produced
 
-async def delete_files_after_delay(filepaths: list[str], delay_seconds: int = 600):
-    """Deletes the specified files after a delay (10 minutes default)."""
-    await asyncio.sleep(delay_seconds)
-    for path in filepaths:
-        if path and os.path.exists(path):
-            try:
-                os.remove(path)
-            except Exception as e:
-                print(f"Failed to delete {path}: {e}")
+# Background job mode: handlers return a job id immediately and worker processes run the conversion.
+STATE_DIR = os.path.join(os.getcwd(), "state")
+JOBS_DB = os.path.join(STATE_DIR, "jobs.db")
+DOWNLOADS_DB = os.path.join(STATE_DIR, "downloads.db")
+EXPIRY_DB = os.path.join(STATE_DIR, "expiry.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+JOB_FILE_TTL = 3600  # job inputs/outputs live longer since the job may wait in the queue
+JOB_RECORD_TTL = 24 * 3600
+CONVERTER_HEALTH_INTERVAL = 60
+JOB_WORKER_CHECK_INTERVAL = 10
+SWEEP_INTERVAL = 30
+MIN_FREE_DISK_BYTES = int(os.environ.get("MIN_FREE_DISK_BYTES", 1024 * 1024 * 1024))  # evict early below 1 GB free
+# Blocking file I/O (uploads, cleanup, SQLite lookups) runs on this many threads of the event loop's executor
+IO_THREADS = int(os.environ.get("IO_THREADS", 32))
+
+init_queue(JOBS_DB)
+download_index = DownloadIndex(DOWNLOADS_DB)
+expiry_store = ExpiryStore(EXPIRY_DB)
+job_worker_processes = []
+background_loops = []
+# Inline (non-job) operations waiting on the task workers; the rest queue here without holding a thread
+task_slots = asyncio.Semaphore(TASK_WORKERS)
+
+async def check_converters_periodically():
+    """Pings the warm converter daemons so dead ones get restarted before the next request."""
+    while True:
+        await asyncio.sleep(CONVERTER_HEALTH_INTERVAL)
+        try:
+            await asyncio.to_thread(converter_health)
+        except Exception as e:
+            print(f"Converter health check failed: {e}")
+
+async def supervise_job_workers():
+    """Restarts job workers that died, so the queue keeps draining without a redeploy."""
+    while True:
+        await asyncio.sleep(JOB_WORKER_CHECK_INTERVAL)
+        try:
+            await asyncio.to_thread(restart_dead_workers, job_worker_processes, JOBS_DB, DOWNLOADS_DB)
+        except Exception as e:
+            print(f"Job worker check failed: {e}")
+
+def sweep_expired():
+    """Deletes expired artifacts (and early ones if disk is low), then drops their download tokens."""
+    removed = expiry_store.sweep()
+    removed += expiry_store.evict_for_space(CONVERTED_DIR, MIN_FREE_DISK_BYTES)
+    download_index.forget_paths(removed)
+    download_index.purge(JOB_RECORD_TTL)
+    purge_finished_jobs(JOBS_DB, JOB_RECORD_TTL)
+
+async def sweep_periodically():
+    while True:
+        try:
+            await asyncio.to_thread(sweep_expired)
+        except Exception as e:
+            print(f"Expiry sweep failed: {e}")
+        await asyncio.sleep(SWEEP_INTERVAL)
+
+@app.on_event("startup")
+async def start_job_workers():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="io"))
+    # Anything on disk that no expiry record knows about is left over from a crash or redeploy.
+    await asyncio.to_thread(expiry_store.reap_orphans, [UPLOAD_DIR, CONVERTED_DIR], JOB_FILE_TTL)
+    job_worker_processes.extend(start_workers(JOBS_DB, DOWNLOADS_DB, JOB_WORKERS))
+    background_loops.extend([
+        asyncio.create_task(check_converters_periodically()),
+        asyncio.create_task(sweep_periodically()),
+        asyncio.create_task(supervise_job_workers())
+    ])
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    # Stop the supervisor first so it doesn't restart the workers being stopped
+    for task in background_loops:
+        task.cancel()
+    background_loops.clear()
+    stop_workers(job_worker_processes)
+    job_worker_processes.clear()
+    await asyncio.to_thread(shutdown_daemon_pools)
+
+@app.get("/health/")
+async def health():
+    return JSONResponse(content={
+        "status": "ok",
+        "job_workers": sum(1 for p in job_worker_processes if p.is_alive()),
+        "converters": await asyncio.to_thread(converter_health)
+    })
+
+async def schedule_deletion(paths: list[str], delay_seconds: int = RESULT_TTL):
+    """
+    Hands the specified files/directories to the expiry sweeper (10 minutes default).
+    Handlers call it before running the operation, so the files of failed requests expire too.
+    """
+    await asyncio.to_thread(expiry_store.schedule, paths, delay_seconds)
+
+def delete_paths(paths: list[str]):
+    """Deletes the specified files/directories right away."""
+    for path in paths:
+        if path:
+            delete_path(path)
+    download_index.forget_paths([os.path.abspath(p) for p in paths if p])
+
+async def save_upload(file: UploadFile, dest_path: str, max_size: int = MAX_FILE_SIZE,
+                      too_large_detail: str = "Dosya boyutu 20MB sınırını aşıyor.",
+                      require_pdf: bool = True, invalid_detail: str = "Geçerli bir PDF dosyası değil.") -> IngestedFile:
+    """
+    Streams an upload straight to dest_path, enforcing the size limit and MIME checks on the fly.
+    The partial/invalid file is removed before an HTTPException is raised.
+    """
+    try:
+        ingested = await stream_upload_to_disk(file, dest_path, max_size)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=too_large_detail)
+
+    try:
+        validate_mime_type(ingested.mime_type)
+        if require_pdf and 'pdf' not in ingested.mime_type.lower():
+            raise HTTPException(status_code=400, detail=invalid_detail)
+    except HTTPException:
+        await asyncio.to_thread(os.remove, dest_path)
+        raise
+    return ingested
+
+async def publish_download(path: str, filename: str, members: list[str] = None) -> str:
+    """Registers a result (or the members of a multi-file result) and returns its download URL."""
+    return f"/download/{await asyncio.to_thread(download_index.register, path, filename, members)}"
+
+def zip_response(file_paths, filename: str) -> StreamingResponse:
+    """Streams a ZIP of file_paths, built while it is being sent."""
+    return StreamingResponse(
+        iter_zip(zip_entries(file_paths)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+    )
+
+async def run_operation(operation: str, params: dict) -> dict:
+    """Runs an operation in the task workers (see run_task_in_worker) without blocking the event loop."""
+    async with task_slots:
+        return await asyncio.to_thread(run_task_in_worker, operation, params)
+
+async def run_in_task_worker(func_name: str, *args):
+    """Runs a scripts.tasks helper (e.g. a preview) in the task workers without blocking the event loop."""
+    async with task_slots:
+        return await asyncio.to_thread(run_in_task_daemon, func_name, *args)
+
+async def submit_job(background_tasks: BackgroundTasks, operation: str, params: dict, files_to_delete: list[str]) -> JSONResponse:
+    """Queues an operation for the job workers and returns the job id right away."""
+    job_id = await asyncio.to_thread(enqueue_job, JOBS_DB, operation, params)
+    await schedule_deletion(files_to_delete, JOB_FILE_TTL)
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    })
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return JSONResponse(content=await asyncio.to_thread(lambda: get_result_cache().stats()))
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = await asyncio.to_thread(get_job, JOBS_DB, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+
+    content = {"job_id": job["id"], "status": job["status"]}
+    if job["progress"]:
+        content["progress"] = job["progress"]
+    if job["status"] == "done":
+        content.update(job["result"])
+    elif job["status"] == "failed":
+        content["error"] = job["error"]
+    return JSONResponse(content=content)
 
 @app.options("/preview/")
 @app.post("/preview/")
-async def preview_file(file: UploadFile = File(...)):
+async def preview_file(file: UploadFile = File(...), pages: str = Form("1"), sprite: bool = Form(False),
+                       fmt: str = Form("webp"), zoom: float = Form(THUMBNAIL_ZOOM)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Önizleme sadece PDF dosyaları için destekleniyor.")
+    if fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail="Desteklenmeyen önizleme formatı.")
+    zoom = min(max(zoom, 0.1), MAX_THUMBNAIL_ZOOM)
 
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 너무 büyük.")
-
-    import fitz # PyMuPDF
-    import base64
+    input_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_preview.pdf")
+    ingested = await save_upload(file, input_path, too_large_detail="Dosya boyutu 너무 büyük.", require_pdf=False)
 
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        if doc.needs_pass:
+        page_count = await run_in_task_worker("document_page_count", input_path)
+        if page_count is None:
             return JSONResponse(content={"error": "locked"})
-        
-        page = doc.load_page(0)
-        pix = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5), alpha=False)
-        img_bytes = pix.tobytes("jpeg")
-        b64_str = base64.b64encode(img_bytes).decode('utf-8')
-        doc.close()
-        
-        return JSONResponse(content={"thumbnail": f"data:image/jpeg;base64,{b64_str}"})
+        try:
+            page_numbers = parse_page_range(pages, page_count)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Geçersiz sayfa aralığı.")
+        if not page_numbers:
+            # e.g. a document without pages; checked here so it isn't reported as "too large"
+            raise HTTPException(status_code=400, detail="Önizlenecek sayfa bulunamadı.")
+
+        # Thumbnails are cached by content hash, so re-selecting the same file doesn't render again
+        content = {"document": ingested.sha256, "page_count": page_count}
+        if sprite:
+            try:
+                layout = await run_in_task_worker("sprite_sheet", input_path, ingested.sha256, page_numbers, zoom, fmt)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Önizleme çok büyük; sayfa aralığını daraltın.")
+            content["sprite"] = dict(layout, url=f"/thumbnails/{layout['key']}")
+            return JSONResponse(content=content)
+
+        thumbs = await run_in_task_worker("page_thumbnails", input_path, ingested.sha256, page_numbers, zoom, fmt)
+        content["thumbnails"] = [{"page": t["page"], "url": f"/thumbnails/{t['key']}"} for t in thumbs]
+        content["thumbnail"] = content["thumbnails"][0]["url"] if thumbs else None
+        return JSONResponse(content=content)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Preview Error: {e}")
         return JSONResponse(content={"error": "failed"})
+    finally:
+        await asyncio.to_thread(delete_paths, [input_path])
+
+@app.get("/thumbnails/{key}")
+async def get_thumbnail(key: str):
+    path = await asyncio.to_thread(thumbnail_path, key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Önizleme bulunamadı.")
+    ext = os.path.splitext(path)[1].lstrip(".")
+    # Keys are content hashes, so a given URL always returns the same bytes
+    return FileResponse(
+        path=path,
+        media_type=THUMBNAIL_FORMATS.get(ext, "application/json"),
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{key}"'}
+    )
+
+@app.options("/preview/batch/")
+@app.post("/preview/batch/")
+async def preview_batch(files: list[UploadFile] = File(...), fmt: str = Form("webp"), zoom: float = Form(THUMBNAIL_ZOOM)):
+    if len(files) > MAX_BATCH_PREVIEW_FILES:
+        raise HTTPException(status_code=400, detail=f"En fazla {MAX_BATCH_PREVIEW_FILES} dosya önizlenebilir.")
+    if fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail="Desteklenmeyen önizleme formatı.")
+    zoom = min(max(zoom, 0.1), MAX_THUMBNAIL_ZOOM)
+
+    saved = []
+    for index, file in enumerate(files):
+        if not file.filename.lower().endswith('.pdf'):
+            saved.append((index, file.filename, None, None))
+            continue
+        input_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}_preview.pdf")
+        try:
+            ingested = await save_upload(file, input_path, require_pdf=False)
+            saved.append((index, file.filename, input_path, ingested.sha256))
+        except HTTPException:
+            saved.append((index, file.filename, None, None))
+
+    async def render_one(index: int, name: str, input_path: str, doc_hash: str) -> dict:
+        line = {"index": index, "name": name}
+        if input_path is None:
+            line["error"] = "failed"
+            return line
+        try:
+            preview = await run_in_task_worker("first_page_preview", input_path, doc_hash, fmt, zoom)
+            if "key" in preview:
+                preview["thumbnail"] = f"/thumbnails/{preview.pop('key')}"
+            line.update(preview)
+        except Exception as e:
+            print(f"Preview Error ({name}): {e}")
+            line["error"] = "failed"
+        finally:
+            await asyncio.to_thread(delete_paths, [input_path])
+        return line
+
+    # All documents render at once; each NDJSON line is sent as soon as its thumbnail is ready
+    pending = [asyncio.ensure_future(render_one(*item)) for item in saved]
+
+    async def stream_lines():
+        for next_done in asyncio.as_completed(pending):
+            yield json.dumps(await next_done) + "\n"
+
+    return StreamingResponse(stream_lines(), media_type="application/x-ndjson")
 
 @app.options("/upload/")
 @app.post("/upload/")
-async def upload_file(background_tasks: BackgroundTasks, files: list[UploadFile] = File(...), target_format: str = Form(None)):
+async def upload_file(background_tasks: BackgroundTasks, files: list[UploadFile] = File(...), target_format: str = Form(None), job: bool = Form(False),
+                      slide_format: str = Form(None), slide_dpi: int = Form(None),
+                      combine_images: bool = Form(False), image_max_side: int = Form(None)):
     if not files:
         raise HTTPException(status_code=400, detail="Dosya yüklenmedi.")
+    # PDF -> PPTX slide image settings; the converter's defaults apply when omitted
+    options = {}
+    if slide_format:
+        if slide_format.lower() not in SLIDE_IMAGE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Geçersiz slayt görsel formatı. Seçenekler: {', '.join(SLIDE_IMAGE_FORMATS)}")
+        options["slide_format"] = slide_format.lower()
+    if slide_dpi is not None:
+        if not MIN_SLIDE_DPI <= slide_dpi <= MAX_SLIDE_DPI:
+            raise HTTPException(status_code=400, detail=f"Slayt çözünürlüğü {MIN_SLIDE_DPI}-{MAX_SLIDE_DPI} DPI arasında olmalıdır.")
+        options["slide_dpi"] = slide_dpi
+    if image_max_side is not None:
+        if image_max_side < MIN_IMAGE_SIDE:
+            raise HTTPException(status_code=400, detail=f"Görsel boyutu en az {MIN_IMAGE_SIDE} piksel olmalıdır.")
+        options["image_max_side"] = image_max_side
         
     _id = str(uuid.uuid4())
     temp_dir = os.path.join(UPLOAD_DIR, _id)
@@ -98,267 +364,212 @@ async def upload_file(background_tasks: BackgroundTasks, files: list[UploadFile]
     out_dir = os.path.join(CONVERTED_DIR, _id)
     os.makedirs(out_dir, exist_ok=True)
     
-    files_to_delete = [temp_dir, out_dir]
-    processed_files = []
-    import subprocess
+    zip_filename = f"converted_batch_{_id}.zip"
+    zip_path = os.path.join(CONVERTED_DIR, zip_filename)
+    files_to_delete = [temp_dir, out_dir, zip_path]
+    upload_slots = asyncio.Semaphore(CONVERT_FILE_CONCURRENCY)
+
+    async def ingest(idx: int, file: UploadFile):
+        ext = os.path.splitext(file.filename)[1].lower()
+        base_name = os.path.splitext(file.filename)[0]
+        input_path = os.path.join(temp_dir, f"{idx}_{base_name}{ext}")
+        async with upload_slots:
+            ingested = await save_upload(file, input_path, too_large_detail=f"'{file.filename}' boyutu 20MB sınırını aşıyor.",
+                                         require_pdf=False)
+        return {"path": input_path, "ext": ext, "base_name": base_name, "sha256": ingested.sha256, "index": idx}
+
+    # Files are saved concurrently; a rejected one is reported instead of failing the whole batch
+    saved = await asyncio.gather(*(ingest(idx, file) for idx, file in enumerate(files)), return_exceptions=True)
+    inputs, rejected = [], []
+    for idx, (file, item) in enumerate(zip(files, saved)):
+        if isinstance(item, HTTPException):
+            rejected.append({"index": idx, "file": file.filename, "error": item.detail})
+        elif isinstance(item, BaseException):
+            background_tasks.add_task(delete_paths, files_to_delete)
+            raise item
+        else:
+            inputs.append(item)
+    if not inputs:
+        background_tasks.add_task(delete_paths, files_to_delete)
+        raise next(item for item in saved if isinstance(item, HTTPException))
+        
+    params = {
+        "inputs": inputs,
+        "out_dir": out_dir,
+        "target_format": target_format,
+        "zip_path": zip_path,
+        "options": options,
+        "combine_images": combine_images,
+        "rejected": rejected
+    }
     
+    if job:
+        return await submit_job(background_tasks, "convert", params, files_to_delete)
+        
     try:
-        for idx, file in enumerate(files):
-            file_bytes = await file.read()
-            if len(file_bytes) > MAX_FILE_SIZE:
-                 raise HTTPException(status_code=413, detail=f"'{file.filename}' boyutu 20MB sınırını aşıyor.")
-                 
-            mime_type = validate_file_type(file_bytes)
-            
-            ext = os.path.splitext(file.filename)[1].lower()
-            base_name = os.path.splitext(file.filename)[0]
-            
-            input_path = os.path.join(temp_dir, f"{idx}_{base_name}{ext}")
-            
-            with open(input_path, "wb") as f:
-                f.write(file_bytes)
-            files_to_delete.append(input_path)
-            
-            # Use current target_format or decide default per file
-            t_fmt = target_format
-            if not t_fmt:
-                if ext in [".docx", ".pptx", ".jpg", ".jpeg", ".png"]:
-                    t_fmt = "pdf"
-                elif ext == ".pdf":
-                    t_fmt = "pptx"
-                    
-            if not t_fmt: continue
-            t_fmt = t_fmt.lower()
-            
-            output_path = ""
-            target_ext = ""
-            
-            if ext == ".docx":
-                if t_fmt != "pdf":
-                    raise HTTPException(status_code=400, detail="Word dosyaları sadece PDF formatına dönüştürülebilir.")
-                target_ext = ".pdf"
-                output_path = os.path.join(out_dir, f"{base_name}{target_ext}")
-                venv_python = os.path.join(os.getcwd(), "venv_words", "Scripts", "python.exe")
-                cmd = [venv_python, "-c", "import sys; from scripts.converter_docx import convert_docx_to_pdf; convert_docx_to_pdf(sys.argv[1], sys.argv[2])", input_path, output_path]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0: raise RuntimeError(f"DOCX Dönüşüm Hatası: {result.stderr}")
-                
-            elif ext == ".pptx":
-                if t_fmt != "pdf":
-                    raise HTTPException(status_code=400, detail="PowerPoint sadece PDF'e dönüştürülebilir.")
-                target_ext = ".pdf"
-                output_path = os.path.join(out_dir, f"{base_name}{target_ext}")
-                venv_python = os.path.join(os.getcwd(), "venv_slides", "Scripts", "python.exe")
-                cmd = [venv_python, "-c", "import sys; from scripts.converter_pptx import convert_pptx_to_pdf; convert_pptx_to_pdf(sys.argv[1], sys.argv[2])", input_path, output_path]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0: raise RuntimeError(f"PPTX Dönüşüm Hatası: {result.stderr}")
-                
-            elif ext == ".pdf":
-                if t_fmt == "pptx":
-                    target_ext = ".pptx"
-                    output_path = os.path.join(out_dir, f"{base_name}{target_ext}")
-                    venv_python = os.path.join(os.getcwd(), "venv_slides", "Scripts", "python.exe")
-                    cmd = [venv_python, "-c", "import sys; from scripts.converter_pptx import convert_pdf_to_pptx; convert_pdf_to_pptx(sys.argv[1], sys.argv[2])", input_path, output_path]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode != 0: raise RuntimeError(f"PDF->PPTX Hatası: {result.stderr}")
-                elif t_fmt == "docx":
-                    target_ext = ".docx"
-                    output_path = os.path.join(out_dir, f"{base_name}{target_ext}")
-                    venv_python = os.path.join(os.getcwd(), "venv", "Scripts", "python.exe")
-                    if not os.path.exists(venv_python):
-                        import sys
-                        venv_python = sys.executable
-                    cmd = [venv_python, "-c", "import sys; from scripts.converter_pdf2docx import convert_pdf_to_docx; convert_pdf_to_docx(sys.argv[1], sys.argv[2])", input_path, output_path]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode != 0: raise RuntimeError(f"PDF->DOCX Hatası: {result.stderr}")
-                else:
-                    raise HTTPException(status_code=501, detail=f"PDF'den '{t_fmt}' formatına dönüştürme desteklenmiyor.")
-            elif ext in [".png", ".jpg", ".jpeg"]:
-                target_ext = ".pdf"
-                output_path = os.path.join(out_dir, f"{base_name}{target_ext}")
-                convert_image_to_pdf(input_path, output_path)
-                
-            if output_path and os.path.exists(output_path):
-                processed_files.append(output_path)
-                files_to_delete.append(output_path)
-                
+        result = await run_operation("convert", params)
+    except ValueError as ve:
+        background_tasks.add_task(delete_paths, files_to_delete)
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        background_tasks.add_task(delete_files_after_delay, files_to_delete, 0)
+        background_tasks.add_task(delete_paths, files_to_delete)
         raise HTTPException(status_code=500, detail=str(e))
         
-    if not processed_files:
-        raise HTTPException(status_code=400, detail="Dönüştürülecek dosya bulunamadı veya işlem başarısız.")
-        
-    final_output_filename = ""
-    target_ext_msg = ""
-    
-    # Check if single file or multiple
-    if len(processed_files) == 1:
-        final_output_path = processed_files[0]
-        final_output_filename = os.path.basename(final_output_path)
-        # We don't zip a single file unless it's an image extraction (which /upload/ doesn't handle natively)
-    else:
-        # Zip multiple processed files
-        zip_filename = f"converted_batch_{_id}.zip"
-        zip_path = os.path.join(CONVERTED_DIR, zip_filename)
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for f in processed_files:
-                zipf.write(f, os.path.basename(f))
-                
-        final_output_filename = zip_filename
-        files_to_delete.append(zip_path)
+    final_output_filename = os.path.basename(result["output_path"])
+    files_to_delete.append(result["output_path"])
 
     # Schedule deletion
-    background_tasks.add_task(delete_files_after_delay, files_to_delete, 600)
+    await schedule_deletion(files_to_delete)
     
-    return JSONResponse(content={
-        "message": f"{len(processed_files)} dosya başarıyla dönüştürüldü!",
-        "download_url": f"/download/{final_output_filename}",
+    content = {
+        "message": f"{result['count']} dosya başarıyla dönüştürüldü!",
+        "download_url": await publish_download(result["output_path"], final_output_filename, result.get("members")),
         "original_filename": f"{len(files)} dosya işlendi",
         "converted_filename": final_output_filename
-    })
+    }
+    if result.get("errors"):
+        content["message"] += f" {len(result['errors'])} dosya dönüştürülemedi."
+        content["errors"] = result["errors"]
+    return JSONResponse(content=content)
 
-@app.get("/download/{filename}")
-async def download_file(filename: str):
-    file_path = os.path.join(CONVERTED_DIR, filename)
-    # also check if the file is inside a temp dir
-    if not os.path.exists(file_path):
-        # We might need to search in subdirectories due to our new _id based folders for multiple single files.
-        found = False
-        if len(filename.split('_')) > 0: # single files are saved as base_name.pdf inside an _id dir mostly
-             pass # Not heavily needed since we save zip to CONVERTED_DIR, and single files to out_dir
-        
-    # Standard logic: Since single files were generated inside CONVERTED_DIR\_id\filename, we actually need to change where single files are downloaded from.
-    # To fix this simply, let's just make the /download route handle direct paths or search if it's not strictly found.
-    # Wait, the best fix is to copy the single file back to CONVERTED_DIR.
-    if not os.path.exists(file_path):
-        # Search for it in subdirs
-        for root, dirs, files in os.walk(CONVERTED_DIR):
-            if filename in files:
-                file_path = os.path.join(root, filename)
-                break
-                
-    if not os.path.exists(file_path):
+@app.get("/download/{token}")
+async def download_file(token: str):
+    entry = await asyncio.to_thread(download_index.lookup, token)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Dosya bulunamadı veya süresi dolduğu için silindi.")
     
+    file_path, filename, members = entry
+    if members:
+        # Multi-file results are zipped on the fly instead of keeping a zipped copy on disk
+        if not all(os.path.exists(m) for m in members):
+            raise HTTPException(status_code=404, detail="Dosya bulunamadı veya süresi dolduğu için silindi.")
+        return zip_response(members, filename)
+    
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı veya süresi dolduğu için silindi.")
     return FileResponse(
         file_path, 
         filename=filename,
-        media_type='application/octet-stream',
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        media_type='application/octet-stream'
     )
 
 @app.options("/merge/")
 @app.post("/merge/")
-async def merge_files(background_tasks: BackgroundTasks, files: list[UploadFile] = File(...)):
+async def merge_files(background_tasks: BackgroundTasks, files: list[UploadFile] = File(...), job: bool = Form(False),
+                      page_ranges: list[str] = Form(None)):
     if len(files) < 2:
         raise HTTPException(status_code=400, detail="Birleştirme işlemi için en az 2 PDF dosyası yüklemelisiniz.")
+    if page_ranges and len(page_ranges) != len(files):
+        raise HTTPException(status_code=400, detail="Her dosya için bir sayfa aralığı belirtilmelidir.")
         
     input_paths = []
+    input_hashes = []
     _id = str(uuid.uuid4())
     temp_dir = os.path.join(UPLOAD_DIR, _id)
     os.makedirs(temp_dir, exist_ok=True)
     
-    for idx, file in enumerate(files):
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Sadece PDF dosyaları birleştirilebilir.")
-            
-        file_bytes = await file.read()
-        if len(file_bytes) > MAX_FILE_SIZE:
-             raise HTTPException(status_code=413, detail=f"Dosya '{file.filename}' boyutu 20MB sınırını aşıyor.")
-             
-        # Validate with magic
-        mime_type = validate_file_type(file_bytes)
-        if 'pdf' not in mime_type.lower():
-            raise HTTPException(status_code=400, detail=f"'{file.filename}' geçerli bir PDF dosyası değil.")
-             
-        input_path = os.path.join(temp_dir, f"{idx}_{file.filename}")
-        with open(input_path, "wb") as f:
-            f.write(file_bytes)
-        input_paths.append(input_path)
+    try:
+        for idx, file in enumerate(files):
+            if not file.filename.lower().endswith('.pdf'):
+                raise HTTPException(status_code=400, detail="Sadece PDF dosyaları birleştirilebilir.")
+                
+            input_path = os.path.join(temp_dir, f"{idx}_{file.filename}")
+            ingested = await save_upload(file, input_path,
+                                         too_large_detail=f"Dosya '{file.filename}' boyutu 20MB sınırını aşıyor.",
+                                         invalid_detail=f"'{file.filename}' geçerli bir PDF dosyası değil.")
+            input_paths.append(input_path)
+            input_hashes.append(ingested.sha256)
+    except HTTPException:
+        # Files saved before the rejected one
+        background_tasks.add_task(delete_paths, [temp_dir])
+        raise
             
     output_filename = f"merged_{_id}.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
+    files_to_delete = [temp_dir, output_path]
+    params = {"input_paths": input_paths, "output_path": output_path, "display_name": "merged_file.pdf",
+              "input_hashes": input_hashes, "page_ranges": page_ranges}
+    
+    if job:
+        return await submit_job(background_tasks, "merge", params, files_to_delete)
     
+    await schedule_deletion(files_to_delete)
     try:
-        merge_pdfs(input_paths, output_path)
+        await run_operation("merge", params)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa aralığı.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Birleştirme sırasında hata: {str(e)}")
         
-    # Cleanup task
-    files_to_delete = input_paths + [output_path]
-    background_tasks.add_task(delete_files_after_delay, files_to_delete, 600)
-    
     return JSONResponse(content={
         "message": "PDF'ler başarıyla birleştirildi!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, "merged_file.pdf"),
         "original_filename": f"{len(files)} dosya birleştirildi",
         "converted_filename": "merged_file.pdf"
     })
 
 @app.options("/split/")
 @app.post("/split/")
-async def split_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def split_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), job: bool = Form(False), stream: bool = Form(False),
+                     mode: str = Form("pages"), ranges: str = Form(None), every: int = Form(None),
+                     max_size_mb: float = Form(None)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları bölünebilir.")
-        
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    # Validate with magic
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
+    if mode not in SPLIT_MODES:
+        raise HTTPException(status_code=400, detail="Geçersiz bölme modu.")
+    if mode == "ranges" and not ranges:
+        raise HTTPException(status_code=400, detail="Sayfa aralıkları belirtilmelidir.")
+    if mode == "every" and (not every or every < 1):
+        raise HTTPException(status_code=400, detail="Kaç sayfada bir bölüneceği belirtilmelidir.")
+    if mode == "size" and (not max_size_mb or max_size_mb <= 0):
+        raise HTTPException(status_code=400, detail="Geçerli bir en büyük dosya boyutu belirtilmelidir.")
         
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
     input_path = os.path.join(UPLOAD_DIR, f"{_id}.pdf")
+    
+    await save_upload(file, input_path)
+    
     temp_dir = os.path.join(CONVERTED_DIR, _id)
     os.makedirs(temp_dir, exist_ok=True)
-    
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
         
     zip_filename = f"split_{_id}.zip"
     zip_filepath = os.path.join(CONVERTED_DIR, zip_filename)
-    files_to_delete = [input_path, zip_filepath]
+    files_to_delete = [input_path, zip_filepath, temp_dir]
+    params = {"input_path": input_path, "temp_dir": temp_dir, "base_name": base_name,
+              "zip_path": zip_filepath, "display_name": f"{base_name}_split.zip",
+              "mode": mode, "ranges": ranges, "every": every,
+              "max_bytes": int(max_size_mb * 1024 * 1024) if max_size_mb else None}
+    
+    if job:
+        return await submit_job(background_tasks, "split", params, files_to_delete)
     
+    await schedule_deletion(files_to_delete)
     try:
-        split_files = split_pdf(input_path, temp_dir, base_name)
-        
-        # Zip them together
-        with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for f in split_files:
-                zipf.write(f, os.path.basename(f))
-                files_to_delete.append(f)
-                
+        result = await run_operation("split", params)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa aralığı.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Bölme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, files_to_delete, 600)
+    if stream:
+        return zip_response(result["members"], f"{base_name}_split.zip")
     
     return JSONResponse(content={
         "message": "PDF başarıyla bölündü!",
-        "download_url": f"/download/{zip_filename}",
+        "download_url": await publish_download(zip_filepath, f"{base_name}_split.zip", result["members"]),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_split.zip"
     })
 
 @app.options("/compress/")
 @app.post("/compress/")
-async def compress_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), level: str = Form('medium')):
+async def compress_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), level: str = Form('medium'), job: bool = Form(False),
+                        target_bytes: int = Form(None)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları sıkıştırılabilir.")
-        
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE * 5: # allow 100MB for compression
-        raise HTTPException(status_code=413, detail="Sıkıştırılacak dosya boyutu 100MB sınırını aşıyor.")
-        
-    # Validate with magic
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
+    if target_bytes is not None and target_bytes <= 0:
+        raise HTTPException(status_code=400, detail="Hedef boyut sıfırdan büyük olmalıdır.")
         
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
@@ -366,74 +577,77 @@ async def compress_file(background_tasks: BackgroundTasks, file: UploadFile = Fi
     output_filename = f"{_id}_compressed.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    # allow 100MB for compression
+    ingested = await save_upload(file, input_path, max_size=MAX_FILE_SIZE * 5,
+                                 too_large_detail="Sıkıştırılacak dosya boyutu 100MB sınırını aşıyor.")
         
+    params = {"input_path": input_path, "output_path": output_path, "level": level,
+              "target_bytes": target_bytes,
+              "display_name": f"{base_name}_compressed.pdf", "input_hashes": [ingested.sha256]}
+    
+    if job:
+        return await submit_job(background_tasks, "compress", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        compress_pdf(input_path, output_path, level=level)
+        await run_operation("compress", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sıkıştırma sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
-    return JSONResponse(content={
+    content = {
         "message": "PDF başarıyla sıkıştırıldı!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, f"{base_name}_compressed.pdf"),
         "original_filename": file.filename,
-        "converted_filename": f"{base_name}_compressed.pdf"
-    })
+        "converted_filename": f"{base_name}_compressed.pdf",
+        "original_size": ingested.size,
+        "compressed_size": os.path.getsize(output_path)
+    }
+    if target_bytes:
+        # Read the size from the file: a result cache hit doesn't carry the compression report
+        content["target_bytes"] = target_bytes
+        content["target_met"] = content["compressed_size"] <= target_bytes
+    return JSONResponse(content=content)
 
 @app.options("/rotate/")
 @app.post("/rotate/")
-async def rotate_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), degrees: int = Form(90)):
+async def rotate_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), degrees: int = Form(90), job: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları döndürülebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
     input_path = os.path.join(UPLOAD_DIR, f"{_id}_unrotated.pdf")
     output_filename = f"{_id}_rotated.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    ingested = await save_upload(file, input_path)
         
+    params = {"input_path": input_path, "output_path": output_path, "degrees": degrees,
+              "display_name": f"{base_name}_rotated.pdf",
+              "input_hashes": [ingested.sha256]}
+    
+    if job:
+        return await submit_job(background_tasks, "rotate", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        rotate_pdf(input_path, output_path, degrees=degrees)
+        await run_operation("rotate", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Döndürme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
     return JSONResponse(content={
         "message": f"PDF başarıyla {degrees} derece döndürüldü!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, f"{base_name}_rotated.pdf"),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_rotated.pdf"
     })
 
 @app.options("/watermark/")
 @app.post("/watermark/")
-async def watermark_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), text: str = Form(...)):
+async def watermark_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), text: str = Form(...), job: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyalarına filigran eklenebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     if not text or len(text.strip()) == 0:
         raise HTTPException(status_code=400, detail="Filigran metni boş olamaz.")
         
@@ -443,84 +657,75 @@ async def watermark_file(background_tasks: BackgroundTasks, file: UploadFile = F
     output_filename = f"{_id}_watermarked.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    ingested = await save_upload(file, input_path)
         
+    params = {"input_path": input_path, "output_path": output_path, "text": text,
+              "display_name": f"{base_name}_watermarked.pdf",
+              "input_hashes": [ingested.sha256]}
+    
+    if job:
+        return await submit_job(background_tasks, "watermark", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        watermark_pdf(input_path, output_path, watermark_text=text)
+        await run_operation("watermark", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Filigran eklenirken hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
     return JSONResponse(content={
         "message": "PDF'e başarıyla filigran eklendi!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, f"{base_name}_watermarked.pdf"),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_watermarked.pdf"
     })
 
 @app.options("/pdf-to-image/")
 @app.post("/pdf-to-image/")
-async def pdf_to_image_file(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def pdf_to_image_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), job: bool = Form(False), stream: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları görsellere dönüştürülebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
     input_path = os.path.join(UPLOAD_DIR, f"{_id}.pdf")
+    
+    await save_upload(file, input_path)
+    
     temp_dir = os.path.join(CONVERTED_DIR, _id)
     os.makedirs(temp_dir, exist_ok=True)
-    
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
         
     zip_filename = f"{base_name}_images_{_id}.zip"
     zip_filepath = os.path.join(CONVERTED_DIR, zip_filename)
-    files_to_delete = [input_path, zip_filepath]
+    files_to_delete = [input_path, zip_filepath, temp_dir]
+    
+    params = {"input_path": input_path, "temp_dir": temp_dir, "base_name": base_name,
+              "zip_path": zip_filepath, "display_name": f"{base_name}_images.zip"}
     
+    if job:
+        return await submit_job(background_tasks, "pdf_to_image", params, files_to_delete)
+    
+    await schedule_deletion(files_to_delete)
     try:
-        image_files = pdf_to_images(input_path, temp_dir, base_name)
-        
-        with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for f in image_files:
-                zipf.write(f, os.path.basename(f))
-                files_to_delete.append(f)
-                
+        result = await run_operation("pdf_to_image", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dönüştürme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, files_to_delete, 600)
+    if stream:
+        return zip_response(result["members"], f"{base_name}_images.zip")
     
     return JSONResponse(content={
         "message": "PDF başarıyla görsellere dönüştürüldü!",
-        "download_url": f"/download/{zip_filename}",
+        "download_url": await publish_download(zip_filepath, f"{base_name}_images.zip", result["members"]),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_images.zip"
     })
 
 @app.options("/protect/")
 @app.post("/protect/")
-async def protect_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), password: str = Form(...)):
+async def protect_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), password: str = Form(...), job: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları şifrelenebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     if not password:
         raise HTTPException(status_code=400, detail="Şifre boş olamaz.")
         
@@ -530,37 +735,33 @@ async def protect_file(background_tasks: BackgroundTasks, file: UploadFile = Fil
     output_filename = f"{_id}_protected.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    await save_upload(file, input_path)
         
+    params = {"input_path": input_path, "output_path": output_path, "password": password,
+              "display_name": f"{base_name}_protected.pdf"}
+    
+    if job:
+        return await submit_job(background_tasks, "protect", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        encrypt_pdf(input_path, output_path, password)
+        await run_operation("protect", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Şifreleme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
     return JSONResponse(content={
         "message": "PDF başarıyla şifrelendi!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, f"{base_name}_protected.pdf"),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_protected.pdf"
     })
 
 @app.options("/unlock/")
 @app.post("/unlock/")
-async def unlock_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), password: str = Form(...)):
+async def unlock_file(background_tasks: BackgroundTasks, file: UploadFile = File(...), password: str = Form(...), job: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyalarının şifresi çözülebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     if not password:
         raise HTTPException(status_code=400, detail="Şifre boş olamaz.")
         
@@ -570,125 +771,107 @@ async def unlock_file(background_tasks: BackgroundTasks, file: UploadFile = File
     output_filename = f"{_id}_unlocked.pdf"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    await save_upload(file, input_path)
         
+    params = {"input_path": input_path, "output_path": output_path, "password": password,
+              "display_name": f"{base_name}_unlocked.pdf"}
+    
+    if job:
+        return await submit_job(background_tasks, "unlock", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        decrypt_pdf(input_path, output_path, password)
+        await run_operation("unlock", params)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Şifre çözme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
     return JSONResponse(content={
         "message": "PDF şifresi başarıyla çözüldü!",
-        "download_url": f"/download/{output_filename}",
+        "download_url": await publish_download(output_path, f"{base_name}_unlocked.pdf"),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_unlocked.pdf"
     })
 
 @app.options("/convert/jpg/")
 @app.post("/convert/jpg/")
-async def convert_to_jpg(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def convert_to_jpg(background_tasks: BackgroundTasks, file: UploadFile = File(...), job: bool = Form(False), stream: bool = Form(False)):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları JPG'ye dönüştürülebilir.")
         
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
-        
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
     input_path = os.path.join(UPLOAD_DIR, f"{_id}.pdf")
+    
+    await save_upload(file, input_path)
+    
     temp_dir = os.path.join(CONVERTED_DIR, _id)
     os.makedirs(temp_dir, exist_ok=True)
-    
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
         
     zip_filename = f"{base_name}_jpgs_{_id}.zip"
     zip_filepath = os.path.join(CONVERTED_DIR, zip_filename)
-    files_to_delete = [input_path, zip_filepath]
+    files_to_delete = [input_path, zip_filepath, temp_dir]
+    
+    params = {"input_path": input_path, "temp_dir": temp_dir, "base_name": base_name,
+              "zip_path": zip_filepath, "display_name": f"{base_name}_jpgs.zip"}
+    
+    if job:
+        return await submit_job(background_tasks, "pdf_to_jpg", params, files_to_delete)
     
+    await schedule_deletion(files_to_delete)
     try:
-        from scripts.converter_pdf2jpg import convert_pdf_to_jpg
-        image_files = convert_pdf_to_jpg(input_path, temp_dir, base_name)
-        
-        with zipfile.ZipFile(zip_filepath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for f in image_files:
-                zipf.write(f, os.path.basename(f))
-                files_to_delete.append(f)
-                
+        result = await run_operation("pdf_to_jpg", params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dönüştürme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, files_to_delete, 600)
+    if stream:
+        return zip_response(result["members"], f"{base_name}_jpgs.zip")
     
     return JSONResponse(content={
         "message": "PDF başarıyla JPG görsellere dönüştürüldü!",
-        "download_url": f"/download/{zip_filename}",
+        "download_url": await publish_download(zip_filepath, f"{base_name}_jpgs.zip", result["members"]),
         "original_filename": file.filename,
         "converted_filename": f"{base_name}_jpgs.zip"
     })
 
 @app.options("/convert/excel/")
 @app.post("/convert/excel/")
-async def convert_to_excel(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def convert_to_excel(background_tasks: BackgroundTasks, file: UploadFile = File(...), job: bool = Form(False),
+                           fmt: str = Form("xlsx")):
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları Excel'e dönüştürülebilir.")
-        
-    file_bytes = await file.read()
-    if len(file_bytes) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="Dosya boyutu 20MB sınırını aşıyor.")
-        
-    mime_type = validate_file_type(file_bytes)
-    if 'pdf' not in mime_type.lower():
-        raise HTTPException(status_code=400, detail="Geçerli bir PDF dosyası değil.")
+    fmt = fmt.lower()
+    if fmt not in TABLE_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz çıktı formatı. Seçenekler: {', '.join(TABLE_OUTPUTS)}")
         
     _id = str(uuid.uuid4())
     base_name = os.path.splitext(file.filename)[0]
+    extension, display_suffix = TABLE_OUTPUTS[fmt]
     input_path = os.path.join(UPLOAD_DIR, f"{_id}_unconverted.pdf")
-    output_filename = f"{_id}_converted.xlsx"
+    output_filename = f"{_id}_converted{extension}"
     output_path = os.path.join(CONVERTED_DIR, output_filename)
+    display_name = f"{base_name}{display_suffix}"
     
-    with open(input_path, "wb") as f:
-        f.write(file_bytes)
+    ingested = await save_upload(file, input_path)
         
+    params = {"input_path": input_path, "output_path": output_path, "display_name": display_name,
+              "input_hashes": [ingested.sha256], "format": fmt}
+    
+    if job:
+        return await submit_job(background_tasks, "pdf_to_excel", params, [input_path, output_path])
+    
+    await schedule_deletion([input_path, output_path])
     try:
-        import subprocess
-        venv_python = os.path.join(os.getcwd(), "venv_excel", "Scripts", "python.exe")
-        if not os.path.exists(venv_python):
-            raise FileNotFoundError("venv_excel Python executable not found")
-        
-        cmd = [venv_python, "-c", "import sys; from scripts.converter_pdf2excel import convert_pdf_to_excel; convert_pdf_to_excel(sys.argv[1], sys.argv[2])", input_path, output_path]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"[HATA] PDF -> EXCEL dönüştürme başarısız. Geri dönüş kodu: {result.returncode}")
-            print(f"[HATA] STDOUT: {result.stdout}")
-            print(f"[HATA] STDERR: {result.stderr}")
-            error_msg = result.stderr.strip() if result.stderr else 'Bilinmeyen Hata'
-            raise RuntimeError(f"PDF'den Excel'e dönüştürme hatası (Kod {result.returncode}): {error_msg}")
-            
+        await run_operation("pdf_to_excel", params)
     except Exception as e:
-        if os.path.exists(input_path):
-            os.remove(input_path)
-        if os.path.exists(output_path):
-            os.remove(output_path)
         raise HTTPException(status_code=500, detail=f"Dönüştürme sırasında hata: {str(e)}")
         
-    background_tasks.add_task(delete_files_after_delay, [input_path, output_path], 600)
-    
     return JSONResponse(content={
-        "message": "PDF başarıyla Excel dosyasına dönüştürüldü!",
-        "download_url": f"/download/{output_filename}",
+        "message": "PDF başarıyla Excel dosyasına dönüştürüldü!" if fmt == "xlsx" else "PDF tabloları başarıyla dışa aktarıldı!",
+        "download_url": await publish_download(output_path, display_name),
         "original_filename": file.filename,
-        "converted_filename": f"{base_name}.xlsx"
+        "converted_filename": display_name
     })
 
 app.mount("/", StaticFiles(directory="static", html=True), name="static")
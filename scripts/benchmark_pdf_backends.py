@@ -0,0 +1,225 @@
+"""
+Benchmarks every available PDF backend per operation on generated documents and verifies
+each output, so the defaults in scripts/pdf_backends.py are backed by numbers.
+Run from the project root:
+
+    python -m scripts.benchmark_pdf_backends [--pages 300] [--repeat 3] [--write]
+
+--write stores the results at PDF_BACKEND_BENCHMARK; the backend selector's auto mode then
+prefers the fastest verified backend per operation on that machine.
+
+Reference run (300 pages, 40 scanned pages for compress, median of 3; 1 vCPU x86_64,
+PyMuPDF 1.28.2, PyPDF2 3.0.1):
+
+    operation   backend      seconds      bytes  ok
+    merge       pymupdf        0.752     343423  yes
+    merge       pypdf2         2.281    3060564  yes
+    split       pymupdf        0.663   16599472  yes
+    split       pypdf2         3.080   16730873  yes
+    rotate      pymupdf        0.167    2030186  yes
+    rotate      pypdf2         1.115    2063219  yes
+    watermark   pymupdf        0.479    2033584  yes
+    watermark   pypdf2         4.400    1528949  yes
+    encrypt     pymupdf        0.236    2265586  yes
+    encrypt     pypdf2         2.527    2063272  yes
+    decrypt     pymupdf        0.358    4059772  yes
+    decrypt     pypdf2         8.733    4125838  yes
+    compress    pymupdf        7.571     679532  yes
+
+The merge inputs share a font and a logo; PyMuPDF stores them once (9x smaller output).
+decrypt unlocks two copies: one with a user password and one locked only by an owner password.
+Aspose (optional, compress only) wasn't installed for that run.
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+import fitz  # PyMuPDF
+
+from scripts.pdf_backends import available_backends, get_backend, DEFAULT_BACKENDS, PDF_BACKEND_BENCHMARK
+
+MERGE_INPUTS = 20
+SCAN_PAGES = 40
+WATERMARK_TEXT = "BENCHMARK"
+PASSWORD = "benchmark"
+
+
+def make_document(path: str, pages: int, label: str, logo: fitz.Pixmap, font_buffer: bytes):
+    """
+    Invoice-like pages: an embedded font, the same logo image on every page and some text.
+    """
+    with fitz.open() as doc:
+        for i in range(pages):
+            page = doc.new_page(width=595, height=842)
+            page.insert_font(fontname="bench", fontbuffer=font_buffer)
+            page.insert_image(fitz.Rect(40, 40, 200, 120), pixmap=logo)
+            page.insert_text((40, 160), f"{label} - page {i + 1}", fontname="bench", fontsize=18)
+            for line in range(30):
+                page.insert_text((40, 200 + line * 20), f"Item {line + 1:02d}  qty {line % 7 + 1}  {label}",
+                                 fontname="bench", fontsize=10)
+        doc.save(path, garbage=3, deflate=True)
+
+
+def make_scan(path: str, pages: int):
+    """
+    Scan-like pages: one full-page 200 dpi photo-like image each (stored losslessly).
+    """
+    from PIL import Image, ImageFilter
+
+    scans = []
+    for i in range(min(pages, 4)):
+        image = Image.effect_noise((1654, 2339), 30 + i).convert("RGB").filter(ImageFilter.GaussianBlur(2))
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        scans.append(buffer.getvalue())
+    with fitz.open() as doc:
+        for i in range(pages):
+            page = doc.new_page(width=595, height=842)
+            page.insert_image(page.rect, stream=scans[i % len(scans)])
+        doc.save(path)
+
+
+def make_fixtures(work_dir: str, pages: int) -> dict:
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 320, 160), False)
+    logo.set_rect(logo.irect, (30, 90, 160))
+    logo.set_rect(fitz.IRect(20, 20, 300, 140), (240, 240, 240))
+    font_buffer = fitz.Font("tiro").buffer
+
+    per_input = max(1, pages // MERGE_INPUTS)
+    merge_inputs = []
+    for i in range(MERGE_INPUTS):
+        path = os.path.join(work_dir, f"merge_{i}.pdf")
+        make_document(path, per_input, f"Invoice {i + 1}", logo, font_buffer)
+        merge_inputs.append(path)
+
+    document = os.path.join(work_dir, "document.pdf")
+    make_document(document, pages, "Report", logo, font_buffer)
+    encrypted = os.path.join(work_dir, "encrypted.pdf")
+    owner_locked = os.path.join(work_dir, "owner_locked.pdf")
+    with fitz.open(document) as doc:
+        # RC4 so every backend can open it without optional crypto packages
+        doc.save(encrypted, encryption=fitz.PDF_ENCRYPT_RC4_128, user_pw=PASSWORD, owner_pw=PASSWORD)
+        # Owner (permissions) password only: opens without a password but is still encrypted
+        doc.save(owner_locked, encryption=fitz.PDF_ENCRYPT_RC4_128, owner_pw=PASSWORD,
+                 permissions=fitz.PDF_PERM_PRINT)
+    scan = os.path.join(work_dir, "scan.pdf")
+    make_scan(scan, SCAN_PAGES)
+    return {"merge_inputs": merge_inputs, "document": document, "encrypted": encrypted,
+            "owner_locked": owner_locked, "scan": scan,
+            "pages": pages, "merged_pages": per_input * MERGE_INPUTS}
+
+
+def _page_count(path: str, password: str = None) -> int:
+    with fitz.open(path) as doc:
+        if password:
+            doc.authenticate(password)
+        return len(doc)
+
+
+def run_operation(operation: str, backend: str, fixtures: dict, out_dir: str) -> tuple[list[str], bool]:
+    """
+    Runs one operation and returns (output paths, verified).
+    """
+    func = get_backend(operation, backend)
+    output_path = os.path.join(out_dir, "out.pdf")
+    document = fixtures["document"]
+
+    if operation == "merge":
+        func(fixtures["merge_inputs"], output_path)
+        return [output_path], _page_count(output_path) == fixtures["merged_pages"]
+    if operation == "split":
+        parts = func(document, out_dir, "part")
+        return parts, len(parts) == fixtures["pages"] and all(_page_count(p) == 1 for p in parts)
+    if operation == "rotate":
+        func(document, output_path, degrees=90)
+        with fitz.open(output_path) as doc:
+            return [output_path], all(page.rotation == 90 for page in doc)
+    if operation == "watermark":
+        func(document, output_path, WATERMARK_TEXT)
+        with fitz.open(output_path) as doc:
+            return [output_path], all(WATERMARK_TEXT in doc[i].get_text() for i in (0, len(doc) - 1))
+    if operation == "encrypt":
+        func(document, output_path, PASSWORD)
+        with fitz.open(output_path) as doc:
+            locked = doc.needs_pass
+        return [output_path], locked and _page_count(output_path, PASSWORD) == fixtures["pages"]
+    if operation == "decrypt":
+        outputs, verified = [], True
+        for fixture in ("encrypted", "owner_locked"):
+            path = os.path.join(out_dir, f"{fixture}.pdf")
+            func(fixtures[fixture], path, PASSWORD)
+            with fitz.open(path) as doc:
+                unlocked = not doc.is_encrypted and not doc.metadata.get("encryption")
+                verified = verified and unlocked and len(doc) == fixtures["pages"]
+            outputs.append(path)
+        return outputs, verified
+    if operation == "compress":
+        func(fixtures["scan"], output_path, level="medium")
+        smaller = os.path.getsize(output_path) < os.path.getsize(fixtures["scan"])
+        return [output_path], smaller and _page_count(output_path) == SCAN_PAGES
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def benchmark(pages: int, repeat: int) -> dict:
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="pdf_backend_bench_")
+    try:
+        fixtures = make_fixtures(work_dir, pages)
+        for operation in DEFAULT_BACKENDS:
+            results[operation] = {}
+            for backend in available_backends(operation):
+                timings, verified, size, error = [], True, 0, None
+                for _ in range(repeat):
+                    out_dir = tempfile.mkdtemp(dir=work_dir)
+                    try:
+                        start = time.perf_counter()
+                        outputs, ok = run_operation(operation, backend, fixtures, out_dir)
+                        timings.append(time.perf_counter() - start)
+                        verified = verified and ok
+                        size = sum(os.path.getsize(p) for p in outputs)
+                    except Exception as e:
+                        verified, error = False, str(e)
+                        break
+                    finally:
+                        shutil.rmtree(out_dir, ignore_errors=True)
+                results[operation][backend] = {
+                    "seconds": round(statistics.median(timings), 4) if timings else None,
+                    "bytes": size,
+                    "verified": verified,
+                    "error": error,
+                }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--write", action="store_true", help=f"save results to {PDF_BACKEND_BENCHMARK}")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.pages, args.repeat)
+    print(f"{'operation':<11} {'backend':<9} {'seconds':>10} {'bytes':>10}  ok")
+    for operation, backends in results.items():
+        for backend, r in backends.items():
+            seconds = f"{r['seconds']:.3f}" if r["seconds"] is not None else "-"
+            ok = "yes" if r["verified"] else f"no ({r['error']})" if r["error"] else "no"
+            print(f"{operation:<11} {backend:<9} {seconds:>10} {r['bytes']:>10}  {ok}")
+
+    if args.write:
+        os.makedirs(os.path.dirname(PDF_BACKEND_BENCHMARK), exist_ok=True)
+        with open(PDF_BACKEND_BENCHMARK, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {PDF_BACKEND_BENCHMARK}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
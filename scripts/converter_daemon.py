@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import importlib
+import threading
+import traceback
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Long-lived converter processes. Each daemon runs inside one of the converter venvs
+# (venv_words, venv_slides, venv_excel, ...), imports its converter modules once and then
+# serves requests as JSON lines over stdin/stdout:
+#   request:  {"id": 1, "module": "scripts.converter_pptx", "func": "convert_pptx_to_pdf", "args": [...]}
+#   response: {"id": 1, "ok": true, "result": ...} or {"id": 1, "ok": false, "error": "...", "error_type": "ValueError"}
+# While a request runs, the converter may send any number of progress messages for it
+# through report_progress():  {"id": 1, "progress": {...}}
+
+PING = "__ping__"
+EXIT = "__exit__"
+# Process pools a worker may start (render pool, DOCX render/parse pools), sized by these variables
+POOL_SIZE_VARIABLES = ("RENDER_WORKERS", "DOCX_WORKERS", "PDF_TO_DOCX_WORKERS")
+
+_reply = None
+_current_id = None
+
+
+def report_progress(progress: dict):
+    """
+    Converter side: reports partial progress of the running request to the parent.
+    Does nothing outside a daemon (e.g. when a converter is run directly).
+    """
+    if _reply is not None and _current_id is not None:
+        _reply({"id": _current_id, "progress": progress})
+
+
+def pool_size_overrides(processes: int) -> dict:
+    """
+    Environment for one of `processes` sibling workers (daemons of a pool, job workers):
+    their process pools share the cores instead of each sizing itself to all of them.
+    Variables set explicitly in the environment are kept.
+    """
+    cores = str(max(1, (os.cpu_count() or 1) // max(1, processes)))
+    return {name: cores for name in POOL_SIZE_VARIABLES if name not in os.environ}
+
+
+def serve(module_names: list[str]):
+    """
+    Daemon side: loads the converter modules and answers requests until stdin closes.
+    """
+    global _reply, _current_id
+    # Run with -m this module is __main__; converters importing report_progress must
+    # get this copy, whose _reply/_current_id are set below
+    sys.modules.setdefault("scripts.converter_daemon", sys.modules[__name__])
+    # Keep the real stdout for the protocol; anything the converters print goes to stderr.
+    proto_out = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    modules = {name: importlib.import_module(name) for name in module_names}
+
+    write_lock = threading.Lock()
+
+    def reply(message: dict):
+        # Progress can be reported from converter threads (e.g. pool callbacks)
+        with write_lock:
+            proto_out.write(json.dumps(message) + "\n")
+            proto_out.flush()
+
+    _reply = reply
+    reply({"id": 0, "ok": True, "result": "ready"})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request = json.loads(line)
+        req_id = request.get("id")
+        func_name = request.get("func")
+
+        if func_name == PING:
+            reply({"id": req_id, "ok": True, "result": "pong"})
+            continue
+        if func_name == EXIT:
+            reply({"id": req_id, "ok": True, "result": "bye"})
+            break
+
+        _current_id = req_id
+        try:
+            module = modules.get(request.get("module"))
+            if module is None or func_name.startswith("_"):
+                raise ValueError(f"Unknown converter: {request.get('module')}.{func_name}")
+            result = getattr(module, func_name)(*request.get("args", []))
+            _current_id = None
+            reply({"id": req_id, "ok": True, "result": result})
+        except Exception as e:
+            _current_id = None
+            traceback.print_exc()
+            reply({"id": req_id, "ok": False, "error": str(e), "error_type": type(e).__name__})
+
+
+class ConverterDaemon:
+    """
+    Parent side handle for one daemon process. Not thread-safe; DaemonPool hands each
+    daemon to one caller at a time.
+    """
+
+    def __init__(self, name: str, python: str, modules: list[str], max_jobs: int = 200,
+                 startup_timeout: float = 120, env: dict = None):
+        self.name = name
+        self.env = env
+        self.python = python
+        self.modules = modules
+        self.max_jobs = max_jobs
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.jobs_done = 0
+        self.restarts = 0
+        self._responses = None
+        self._next_id = 0
+
+    def _reader(self, stream, responses: queue.Queue):
+        for line in stream:
+            try:
+                responses.put(json.loads(line))
+            except ValueError:
+                logger.warning(f"[{self.name}] Unexpected daemon output: {line.rstrip()}")
+        responses.put(None)  # EOF: the process exited
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [self.python, "-m", "scripts.converter_daemon", *self.modules],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1, env=self.env,
+        )
+        self._responses = queue.Queue()
+        threading.Thread(target=self._reader, args=(self.process.stdout, self._responses), daemon=True).start()
+        self.jobs_done = 0
+        self._await(0, self.startup_timeout)
+        logger.info(f"[{self.name}] Converter daemon started (pid {self.process.pid}).")
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self._send(EXIT)
+                self.process.wait(timeout=5)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _send(self, func: str, module: str = None, args: list = None) -> int:
+        self._next_id += 1
+        request = {"id": self._next_id, "module": module, "func": func, "args": args or []}
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+        return self._next_id
+
+    def _await(self, req_id: int, timeout: float | None, on_progress=None):
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"{self.name} converter timed out after {timeout} seconds.")
+            try:
+                message = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if message is None:
+                raise RuntimeError(f"{self.name} converter process exited unexpectedly.")
+            if message.get("id") != req_id:
+                continue
+            if "progress" in message:
+                if on_progress is not None:
+                    on_progress(message["progress"])
+                continue
+            if not message.get("ok"):
+                # Invalid input (e.g. a bad page range) stays a ValueError for the caller
+                error = ValueError if message.get("error_type") == "ValueError" else RuntimeError
+                raise error(message.get("error") or "Bilinmeyen Hata")
+            return message.get("result")
+
+    def call(self, module: str, func: str, args: list, timeout: float | None = None, on_progress=None):
+        """
+        Runs module.func(*args) in the daemon, (re)starting it first if needed.
+        on_progress(dict) is called with any progress the converter reports.
+        A timeout or crash kills the process so the next call gets a fresh one.
+        """
+        if not self.is_alive():
+            if self.process is not None:
+                self.restarts += 1
+                logger.warning(f"[{self.name}] Converter daemon died, restarting.")
+            self.start()
+
+        try:
+            req_id = self._send(func, module, list(args))
+            result = self._await(req_id, timeout, on_progress)
+        except (TimeoutError, BrokenPipeError, OSError):
+            self.kill()
+            self.restarts += 1
+            raise
+        except (RuntimeError, ValueError):
+            if not self.is_alive():
+                self.process = None
+                self.restarts += 1
+            raise
+        finally:
+            self.jobs_done += 1
+
+        # Recycle after max_jobs to cap leaks in the converter libraries.
+        if self.jobs_done >= self.max_jobs:
+            logger.info(f"[{self.name}] Recycling converter daemon after {self.jobs_done} jobs.")
+            self.stop()
+        return result
+
+    def ping(self, timeout: float = 10) -> bool:
+        if not self.is_alive():
+            return False
+        try:
+            return self._await(self._send(PING), timeout) == "pong"
+        except Exception:
+            self.kill()
+            return False
+
+
+class DaemonPool:
+    """
+    A fixed-size set of daemons for one venv. Daemons are started lazily on first use.
+    The daemons split the cores between their process pools (see pool_size_overrides).
+    """
+
+    def __init__(self, name: str, python: str, modules: list[str], size: int = 2, max_jobs: int = 200):
+        self.name = name
+        self._idle = queue.LifoQueue()
+        env = dict(os.environ, **pool_size_overrides(size))
+        self._all = [ConverterDaemon(f"{name}#{i}", python, modules, max_jobs=max_jobs, env=env) for i in range(size)]
+        for daemon in self._all:
+            self._idle.put(daemon)
+
+    def call(self, module: str, func: str, *args, timeout: float | None = None, on_progress=None):
+        daemon = self._idle.get()
+        try:
+            return daemon.call(module, func, args, timeout=timeout, on_progress=on_progress)
+        finally:
+            self._idle.put(daemon)
+
+    def health_check(self) -> list[dict]:
+        """
+        Pings idle daemons (busy ones are skipped) and reports the state of every daemon.
+        Dead daemons are restarted on their next call.
+        """
+        checked = []
+        while True:
+            try:
+                daemon = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked.append(daemon)
+        try:
+            for daemon in checked:
+                if daemon.process is not None and not daemon.ping():
+                    daemon.restarts += 1
+                    logger.warning(f"[{daemon.name}] Health check failed, daemon will be restarted.")
+        finally:
+            for daemon in checked:
+                self._idle.put(daemon)
+
+        return [{
+            "name": d.name,
+            "alive": d.is_alive(),
+            "busy": d not in checked,
+            "jobs_done": d.jobs_done,
+            "restarts": d.restarts,
+        } for d in self._all]
+
+    def shutdown(self):
+        for daemon in self._all:
+            daemon.stop()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
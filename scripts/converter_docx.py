@@ -1,31 +1,144 @@
 import os
 import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import pypandoc
 
 logger = logging.getLogger(__name__)
 
-def convert_docx_to_pdf(input_path: str, output_path: str):
+# DOCX -> PDF in two stages, the same ones `pandoc --pdf-engine=weasyprint` runs:
+# pandoc DOCX -> standalone HTML (a subprocess per file, run from threads), then WeasyPrint
+# HTML -> PDF in long-lived worker processes that keep WeasyPrint imported and its font
+# configuration warm between files and batches.
+DOCX_WORKERS = int(os.environ.get("DOCX_WORKERS", os.cpu_count() or 1))
+
+_render_executor = None
+_render_executor_lock = threading.Lock()
+_font_config = None
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is None:
+            _render_executor = ProcessPoolExecutor(max_workers=DOCX_WORKERS, initializer=_warm_up,
+                                                   mp_context=multiprocessing.get_context("spawn"))
+        return _render_executor
+
+
+def _discard_render_executor():
+    # A crashed worker breaks the whole pool; the next batch starts a fresh one
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is not None:
+            _render_executor.shutdown(wait=False, cancel_futures=True)
+            _render_executor = None
+
+
+def _warm_up():
+    """
+    Render worker initializer: imports WeasyPrint and loads the system fonts once.
+    """
+    global _font_config
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:  # WeasyPrint < 53
+        from weasyprint.fonts import FontConfiguration
+    _font_config = FontConfiguration()
+
+
+def _render_pdf(html_path: str, output_path: str) -> str:
+    """
+    Render worker: HTML -> PDF with the worker's warm WeasyPrint font configuration.
+    """
+    from weasyprint import HTML
+    HTML(filename=html_path, base_url=os.path.dirname(html_path)).write_pdf(output_path, font_config=_font_config)
+    return output_path
+
+
+def _docx_to_html(input_path: str, work_dir: str) -> str:
+    """
+    DOCX -> standalone HTML5 with pandoc, images extracted next to it.
+    """
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    html_path = os.path.join(work_dir, "index.html")
+    pypandoc.convert_file(
+        input_path,
+        'html5',
+        outputfile=html_path,
+        extra_args=['--standalone', f'--extract-media={work_dir}', f'--metadata=pagetitle:{name}']
+    )
+    return html_path
+
+
+def _convert_one_with_pandoc(input_path: str, output_path: str):
+    # Fallback when the WeasyPrint package isn't importable here: pandoc drives the weasyprint CLI
+    pypandoc.convert_file(input_path, 'pdf', outputfile=output_path, extra_args=['--pdf-engine=weasyprint'])
+
+
+def convert_docx_batch_to_pdf(pairs: list[list[str]]) -> list[dict]:
     """
-    Converts a DOCX file to PDF using pypandoc.
-    Requires pandoc and a PDF engine (e.g. wkhtmltopdf, weasyprint, or pdflatex) installed on the system.
+    Converts several DOCX files to PDF in one pass: [[input_path, output_path], ...] ->
+    [{"output_path", "error"}] in the same order (error is None on success).
+    pandoc runs for all files in parallel and each HTML goes to the render pool as soon
+    as it is ready.
     """
-    input_path = os.path.abspath(input_path)
-    output_path = os.path.abspath(output_path)
-    
+    pairs = [(os.path.abspath(i), os.path.abspath(o)) for i, o in pairs]
+    results = [{"output_path": output_path, "error": None} for _, output_path in pairs]
+    logger.info(f"Converting {len(pairs)} DOCX file(s) to PDF.")
+
     try:
-        logger.info(f"Attempting DOCX to PDF conversion using pypandoc: {input_path}")
-        # Note: In a cloud environment like Render, you might need to specify the pdf-engine
-        # For this script we rely on the default engine pandoc resolves in the environment.
-        pypandoc.convert_file(
-            input_path, 
-            'pdf', 
-            outputfile=output_path, 
-            extra_args=['--pdf-engine=weasyprint']
-        )
-    except Exception as e:
-        logger.error(f"pypandoc failed to convert DOCX to PDF: {e}")
-        raise RuntimeError(f"pypandoc failed to convert DOCX to PDF: {e}")
-            
-    if not os.path.exists(output_path):
-        raise FileNotFoundError("Conversion failed. PDF not found.")
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):  # OSError: the package is there but Pango isn't
+        for result, (input_path, output_path) in zip(results, pairs):
+            try:
+                _convert_one_with_pandoc(input_path, output_path)
+            except Exception as e:
+                result["error"] = f"pypandoc failed to convert DOCX to PDF: {e}"
+        return results
 
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dirs = [os.path.join(temp_dir, str(i)) for i in range(len(pairs))]
+        for work_dir in work_dirs:
+            os.makedirs(work_dir)
+
+        executor = _get_render_executor()
+        renders = {}
+        with ThreadPoolExecutor(max_workers=DOCX_WORKERS) as pandoc_pool:
+            to_html = {pandoc_pool.submit(_docx_to_html, input_path, work_dir): i
+                       for i, ((input_path, _), work_dir) in enumerate(zip(pairs, work_dirs))}
+            for future in as_completed(to_html):
+                i = to_html[future]
+                try:
+                    renders[executor.submit(_render_pdf, future.result(), pairs[i][1])] = i
+                except Exception as e:
+                    results[i]["error"] = f"pandoc failed to convert DOCX to HTML: {e}"
+
+        for future in as_completed(renders):
+            i = renders[future]
+            try:
+                future.result()
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _discard_render_executor()
+                results[i]["error"] = f"WeasyPrint failed to render PDF: {e}"
+            if results[i]["error"] is None and not os.path.exists(pairs[i][1]):
+                results[i]["error"] = "Conversion failed. PDF not found."
+
+    for result in results:
+        if result["error"]:
+            logger.error(result["error"])
+    return results
+
+
+def convert_docx_to_pdf(input_path: str, output_path: str):
+    """
+    Converts a DOCX file to PDF with pandoc and WeasyPrint (see convert_docx_batch_to_pdf).
+    Requires pandoc installed on the system.
+    """
+    result = convert_docx_batch_to_pdf([[input_path, output_path]])[0]
+    if result["error"]:
+        raise RuntimeError(result["error"])
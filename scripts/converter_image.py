@@ -1,20 +1,72 @@
+import io
 import os
+import fitz  # PyMuPDF
 from PIL import Image
 
-def convert_image_to_pdf(input_path: str, output_path: str):
+IMAGE_RESOLUTION = 100.0  # page size is pixels / IMAGE_RESOLUTION inches, as before
+DOWNSCALE_JPEG_QUALITY = 90
+# EXIF orientation -> counterclockwise rotation for insert_image (mirrored ones are ignored)
+EXIF_ROTATION = {3: 180, 6: 270, 8: 90}
+
+def _image_stream(input_path: str, max_side: int = None) -> tuple[bytes, float, float, int]:
+    """
+    Returns (image data to embed, page width, page height, rotation) for one image.
+    JPEGs are passed through unchanged unless they must be downscaled; then Pillow's
+    draft mode decodes them at a reduced scale first, so large photos are never fully
+    decoded. Other formats are decoded and embedded losslessly.
+    """
+    with Image.open(input_path) as image:
+        width, height = image.size
+        page_width, page_height = width / IMAGE_RESOLUTION * 72, height / IMAGE_RESOLUTION * 72
+        is_jpeg = image.format == "JPEG"
+        rotation = EXIF_ROTATION.get(image.getexif().get(0x0112), 0) if is_jpeg else 0
+        if rotation in (90, 270):
+            page_width, page_height = page_height, page_width
+
+        scale = min(1.0, max_side / max(width, height)) if max_side else 1.0
+        if is_jpeg and scale == 1.0 and image.mode in ("L", "RGB"):
+            with open(input_path, "rb") as f:
+                return f.read(), page_width, page_height, rotation
+
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if is_jpeg:
+            # Decodes at 1/2, 1/4 or 1/8 scale (no smaller than size) straight from the DCT data
+            image.draft("L" if image.mode == "L" else "RGB", size)
+        converted = image.convert("L" if image.mode in ("1", "L") else "RGB")
+        if converted.size != size:
+            converted = converted.resize(size, Image.LANCZOS)
+
+        out = io.BytesIO()
+        if is_jpeg:
+            converted.save(out, "JPEG", quality=DOWNSCALE_JPEG_QUALITY)
+        else:
+            converted.save(out, "PNG")
+        return out.getvalue(), page_width, page_height, rotation
+
+def images_to_pdf(input_paths: list[str], output_path: str, max_side: int = None):
     """
-    Converts an image (PNG, JPG, JPEG) to PDF using Pillow.
+    Assembles images (PNG, JPG, JPEG) into one PDF, a page per image, in a single pass:
+    each image is read, embedded and released before the next one.
+    max_side optionally downscales images whose longest side is larger (in pixels);
+    the page size stays that of the original image.
     """
-    input_path = os.path.abspath(input_path)
     output_path = os.path.abspath(output_path)
-    
+
     try:
-        with Image.open(input_path) as image:
-            # Convert to RGB to ensure compatibility with PDF format
-            rgb_image = image.convert("RGB")
-            rgb_image.save(output_path, "PDF", resolution=100.0)
+        with fitz.open() as doc:
+            for input_path in input_paths:
+                data, page_width, page_height, rotation = _image_stream(os.path.abspath(input_path), max_side)
+                page = doc.new_page(width=page_width, height=page_height)
+                page.insert_image(page.rect, stream=data, rotate=rotation)
+            doc.save(output_path, garbage=3, deflate=True)
     except Exception as e:
         raise RuntimeError(f"Image to PDF conversion failed: {e}")
-    
+
     if not os.path.exists(output_path):
         raise FileNotFoundError("Image to PDF conversion failed, output missing.")
+
+def convert_image_to_pdf(input_path: str, output_path: str, max_side: int = None):
+    """
+    Converts an image (PNG, JPG, JPEG) to a one-page PDF; JPEG data is embedded as is.
+    """
+    images_to_pdf([input_path], output_path, max_side)
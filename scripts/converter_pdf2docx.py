@@ -1,19 +1,88 @@
 import os
+import time
+import multiprocessing
 from pdf2docx import Converter
 
-def convert_pdf_to_docx(input_path: str, output_path: str):
+from scripts.converter_daemon import report_progress
+
+# Pages are parsed in chunks on a process pool (pdf2docx's own multiprocessing writes fixed
+# pages-N.json names into the working directory and can't be stopped) and the parsed layouts
+# are restored into one Converter, which writes a single DOCX.
+DOCX_CHUNK_PAGES = int(os.environ.get("PDF_TO_DOCX_CHUNK_PAGES", 8))
+DOCX_WORKERS = int(os.environ.get("PDF_TO_DOCX_WORKERS", os.cpu_count() or 1))
+DOCX_TIMEOUT = int(os.environ.get("PDF_TO_DOCX_TIMEOUT", 600))  # hard wall-clock limit per conversion
+
+def _parse_chunk(input_path: str, page_indexes: list[int]) -> dict:
     """
-    Converts a PDF file to DOCX using pdf2docx.
+    Pool worker: parses a range of pages and returns pdf2docx's stored layout for them.
+    """
+    cv = Converter(input_path)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(pages=page_indexes).parse_document(**settings).parse_pages(**settings)
+        return cv.store()
+    finally:
+        cv.close()
+
+def _parse_chunks(input_path: str, chunks: list[list[int]], page_count: int, deadline: float) -> list[dict]:
+    """
+    Parses the chunks on a fresh spawn pool and returns their layouts in page order.
+    The pool is terminated if the deadline passes, so no worker outlives the job.
+    """
+    done = [0]
+
+    def chunk_done(pages: int):
+        done[0] += pages
+        report_progress({"pages_done": done[0], "pages": page_count})
+
+    pool = multiprocessing.get_context("spawn").Pool(max(1, min(DOCX_WORKERS, len(chunks))))
+    try:
+        results = [pool.apply_async(_parse_chunk, (input_path, chunk),
+                                    callback=lambda _, pages=len(chunk): chunk_done(pages)) for chunk in chunks]
+        layouts = []
+        for result in results:
+            remaining = deadline - time.monotonic()
+            try:
+                layouts.append(result.get(timeout=max(0, remaining)))
+            except multiprocessing.TimeoutError:
+                raise TimeoutError(f"PDF to DOCX conversion timed out after {done[0]} of {page_count} pages.")
+        pool.close()
+        return layouts
+    finally:
+        pool.terminate()
+
+def convert_pdf_to_docx(input_path: str, output_path: str, timeout: float = None):
+    """
+    Converts a PDF file to DOCX using pdf2docx, parsing page chunks in parallel.
+    Reports {"pages_done", "pages"} as chunks finish and gives up (killing the workers)
+    after `timeout` seconds (DOCX_TIMEOUT by default).
     """
     input_path = os.path.abspath(input_path)
     output_path = os.path.abspath(output_path)
-    
+    deadline = time.monotonic() + (timeout or DOCX_TIMEOUT)
+
     try:
         cv = Converter(input_path)
-        cv.convert(output_path, start=0, end=None)
-        cv.close()
+        try:
+            page_count = len(cv.fitz_doc)
+            settings = cv.default_settings
+            chunks = [list(range(start, min(start + DOCX_CHUNK_PAGES, page_count)))
+                      for start in range(0, page_count, DOCX_CHUNK_PAGES)]
+            report_progress({"pages_done": 0, "pages": page_count})
+
+            if len(chunks) <= 1:
+                # Not worth a pool; the daemon call timeout still bounds this
+                cv.parse(**settings)
+            else:
+                for data in _parse_chunks(input_path, chunks, page_count, deadline):
+                    cv.restore(data)
+            cv.make_docx(output_path, **settings)
+        finally:
+            cv.close()
+    except TimeoutError:
+        raise
     except Exception as e:
         raise RuntimeError(f"PDF to DOCX conversion error: {str(e)}")
-        
+
     if not os.path.exists(output_path):
         raise FileNotFoundError("PDF to DOCX conversion failed.")
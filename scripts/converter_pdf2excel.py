@@ -1,21 +1,201 @@
+import io
 import os
+import csv
 import sys
 import logging
+import zipfile
+from typing import Iterator
 import fitz  # PyMuPDF
-import pandas as pd
+
+from scripts.render_pool import iter_in_pool, RENDER_WORKERS
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def convert_pdf_to_excel(input_path: str, output_path: str):
+# Output formats: one XLSX sheet per table, a ZIP with one CSV per table, or one Parquet
+# file with page/table/row columns. All writers take rows one table at a time.
+TABLE_FORMATS = ("xlsx", "csv", "parquet")
+MAX_SHEET_NAME = 31  # Excel's limit
+MAX_PAGES_PER_RANGE = 20  # bounds how many extracted rows a worker hands back at once
+PARQUET_ROW_GROUP_ROWS = 50_000
+
+# find_tables() runs with its default "lines" strategy, which builds cells only from
+# vector ruling lines and rectangles; a page needs a couple of each direction to hold one.
+MIN_TABLE_EDGES = 2
+EDGE_TOLERANCE = 1.0  # points a line may be off horizontal/vertical
+
+def _has_ruling(page: fitz.Page) -> bool:
+    """
+    Cheap prefilter: True if the page draws enough horizontal and vertical edges for
+    find_tables() to possibly detect a table.
+    """
+    horizontal = vertical = 0
+    for path in page.get_cdrawings():
+        for item in path["items"]:
+            if item[0] == "re" or item[0] == "qu":
+                horizontal += 2
+                vertical += 2
+            elif item[0] == "l":
+                (x0, y0), (x1, y1) = item[1], item[2]
+                if abs(y1 - y0) <= EDGE_TOLERANCE:
+                    horizontal += 1
+                elif abs(x1 - x0) <= EDGE_TOLERANCE:
+                    vertical += 1
+            if horizontal >= MIN_TABLE_EDGES and vertical >= MIN_TABLE_EDGES:
+                return True
+    return False
+
+def _table_rows(tab) -> list[list]:
+    """
+    The table's cells as rows of strings, header row first. Column names follow
+    Table.to_pandas(): empty names become "Col<i>" and duplicates get an "<i>-" prefix.
+    """
+    rows = tab.extract()
+    names = list(tab.header.names)
+    for i, name in enumerate(names):
+        if not name:
+            names[i] = f"Col{i}"
+    if len(set(names)) != len(names):
+        names = [name if name == f"Col{i}" else f"{i}-{name}" for i, name in enumerate(names)]
+    if not tab.header.external:  # the header is the first extracted row
+        rows = rows[1:]
+    return [names] + rows
+
+def _extract_tables(input_path: str, page_numbers: list[int]) -> tuple[list[tuple[int, int, list[list]]], int]:
+    """
+    Process pool worker: runs table detection on a range of pages, skipping pages the
+    prefilter rules out. Returns ([(page number, table index, rows)], pages scanned).
+    """
+    tables, scanned = [], 0
+    with fitz.open(input_path) as doc:
+        if doc.needs_pass:
+            doc.authenticate('')
+        for page_num in page_numbers:
+            page = doc.load_page(page_num)
+            if not _has_ruling(page):
+                continue
+            scanned += 1
+            tabs = page.find_tables()
+            for tab_idx, tab in enumerate(tabs.tables):
+                tables.append((page_num, tab_idx, _table_rows(tab)))
+    return tables, scanned
+
+def _iter_tables(input_path: str, page_count: int) -> Iterator[tuple[int, int, list[list]]]:
+    """
+    Yields (page number, table index, rows) in page order while later page ranges are
+    still being extracted on the process pool.
+    """
+    # A few ranges per worker so one table-heavy stretch doesn't hold up the rest
+    range_count = max(1, min(RENDER_WORKERS * 3, page_count), -(-page_count // MAX_PAGES_PER_RANGE))
+    size = -(-page_count // range_count) if page_count else 1
+    jobs = [(input_path, list(range(start, min(start + size, page_count))))
+            for start in range(0, page_count, size)]
+    scanned = 0
+    for tables, range_scanned in iter_in_pool(_extract_tables, jobs):
+        scanned += range_scanned
+        yield from tables
+    logger.info(f"Ran table detection on {scanned} of {page_count} pages.")
+
+def _unique_name(name: str, used: set, max_length: int = None) -> str:
+    """
+    name (cut to max_length) or, if taken, the same with a "~<n>" suffix that still fits.
+    """
+    candidate, n = name[:max_length], 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f"~{n}"
+        candidate = name[:max_length - len(suffix) if max_length else None] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+def _write_xlsx(output_path: str, tables: Iterator) -> int:
     """
-    Converts tables from a PDF file to Excel (XLSX) using PyMuPDF and pandas.
+    Write-only (streaming) openpyxl workbook: rows go to disk as they are appended.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used, count = set(), 0
+    for page_num, tab_idx, rows in tables:
+        sheet = workbook.create_sheet(_unique_name(f"Page_{page_num+1}_Table_{tab_idx+1}", used, MAX_SHEET_NAME))
+        for row in rows:
+            sheet.append(row)
+        count += 1
+
+    # Handle cases where no tables are found
+    if not count:
+        logger.warning("No tables were found in the PDF. Creating an empty sheet to prevent errors.")
+        workbook.create_sheet("Sheet1").append(["No tables detected in PDF"])
+    workbook.save(output_path)
+    return count
+
+def _write_csv_zip(output_path: str, tables: Iterator) -> int:
+    """
+    One CSV (UTF-8 with BOM, so Excel detects the encoding) per table, written straight
+    into the ZIP entry.
+    """
+    used, count = set(), 0
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for page_num, tab_idx, rows in tables:
+            name = _unique_name(f"page_{page_num+1}_table_{tab_idx+1}.csv", used)
+            with archive.open(name, "w") as entry:
+                text = io.TextIOWrapper(entry, encoding="utf-8-sig", newline="")
+                csv.writer(text).writerows(rows)
+                text.flush()
+                text.detach()
+            count += 1
+    return count
+
+def _write_parquet(output_path: str, tables: Iterator) -> int:
+    """
+    A single Parquet file with columns page, table, row (0 is the header row) and cells
+    (list of strings), written in row groups of PARQUET_ROW_GROUP_ROWS rows.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs the pyarrow package.")
+
+    schema = pa.schema([("page", pa.int32()), ("table", pa.int32()), ("row", pa.int32()),
+                        ("cells", pa.list_(pa.string()))])
+    columns = {name: [] for name in schema.names}
+    count = 0
+
+    def flush():
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for page_num, tab_idx, rows in tables:
+            for row_idx, row in enumerate(rows):
+                columns["page"].append(page_num + 1)
+                columns["table"].append(tab_idx + 1)
+                columns["row"].append(row_idx)
+                columns["cells"].append([None if cell is None else str(cell) for cell in row])
+            count += 1
+            if len(columns["row"]) >= PARQUET_ROW_GROUP_ROWS:
+                flush()
+        if columns["row"]:
+            flush()
+    return count
+
+TABLE_WRITERS = {"xlsx": _write_xlsx, "csv": _write_csv_zip, "parquet": _write_parquet}
+
+def convert_pdf_to_excel(input_path: str, output_path: str, fmt: str = "xlsx"):
+    """
+    Extracts the tables of a PDF file with PyMuPDF into XLSX, a ZIP of CSV files or
+    Parquet (see TABLE_FORMATS). Table detection runs on page ranges across the process
+    pool and the rows are streamed to the writer in page order.
     """
     input_path = os.path.abspath(input_path)
     output_path = os.path.abspath(output_path)
+    if fmt not in TABLE_WRITERS:
+        raise ValueError(f"Unsupported table format: {fmt}")
     
     try:
-        logger.info(f"Starting PDF to Excel conversion. Input: {input_path}, Output: {output_path}")
+        logger.info(f"Starting PDF to {fmt} conversion. Input: {input_path}, Output: {output_path}")
         
         with fitz.open(input_path) as doc:
             if doc.needs_pass:
@@ -23,37 +203,24 @@ def convert_pdf_to_excel(input_path: str, output_path: str):
                 if doc.needs_pass:
                     raise RuntimeError("PDF is encrypted and cannot be parsed for tables without a password.")
                     
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                tables_found = False
-                for page_num, page in enumerate(doc):
-                    tabs = page.find_tables()
-                    if tabs:
-                        for tab_idx, tab in enumerate(tabs.tables):
-                            df = tab.to_pandas()
-                            sheet_name = f"Page_{page_num+1}_Table_{tab_idx+1}"
-                            # Excel sheet names must be <= 31 chars
-                            df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
-                            tables_found = True
-                            
-                # Handle cases where no tables are found
-                if not tables_found:
-                    logger.warning("No tables were found in the PDF. Creating an empty sheet to prevent errors.")
-                    pd.DataFrame(["No tables detected in PDF"]).to_excel(writer, sheet_name="Sheet1", index=False)
+            page_count = len(doc)
+
+        count = TABLE_WRITERS[fmt](output_path, _iter_tables(input_path, page_count))
         
         if not os.path.exists(output_path):
             logger.error("Output file not found after conversion.")
             raise FileNotFoundError("PDF to Excel conversion failed.")
             
-        logger.info("Conversion completed successfully.")
+        logger.info(f"Conversion completed successfully ({count} tables).")
     except Exception as e:
         import traceback
         traceback.print_exc()
         logger.exception(f"Exception during PDF to Excel conversion: {str(e)}")
-        raise RuntimeError(f"PyMuPDF/pandas table extraction error: {str(e)}")
+        raise RuntimeError(f"PyMuPDF table extraction error: {str(e)}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Kullanım: python converter_pdf2excel.py <girdi_pdf> <çıktı_xlsx>")
+        print("Kullanım: python -m scripts.converter_pdf2excel <girdi_pdf> <çıktı_dosyası> [xlsx|csv|parquet]")
         sys.exit(1)
     
-    convert_pdf_to_excel(sys.argv[1], sys.argv[2])
+    convert_pdf_to_excel(sys.argv[1], sys.argv[2], *sys.argv[3:4])
@@ -1,7 +1,7 @@
 import os
-import zipfile
 import logging
-import fitz  # PyMuPDF
+
+from scripts.render_pool import render_pages
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -13,31 +13,11 @@ def convert_pdf_to_jpg(input_path: str, temp_dir: str, base_name: str) -> list[s
     """
     input_path = os.path.abspath(input_path)
     temp_dir = os.path.abspath(temp_dir)
-    image_files = []
     
     try:
         logger.info(f"Starting PDF to JPG conversion for {input_path}")
-        with fitz.open(input_path) as doc:
-            if doc.needs_pass:
-                logger.info("PDF is encrypted, attempting to unlock with empty password.")
-                doc.authenticate('')
-                if doc.needs_pass:
-                    raise RuntimeError("PDF is encrypted and cannot be unlocked with an empty password.")
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # Use high resolution zoom
-                zoom = 2.0  # 2x zoom for better quality (roughly 144 DPI)
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page.get_pixmap(matrix=mat, alpha=False)
-                
-                output_filename = f"{base_name}_page_{page_num + 1}.jpg"
-                output_filepath = os.path.join(temp_dir, output_filename)
-                
-                pix.save(output_filepath)
-                image_files.append(output_filepath)
-                logger.debug(f"Saved {output_filepath}")
+        # 2x zoom for better quality (roughly 144 DPI); pages are split across the render pool
+        image_files = render_pages(input_path, temp_dir, base_name, zoom=2.0, fmt="jpg")
                 
         logger.info(f"Conversion complete. Generated {len(image_files)} images.")
         return image_files
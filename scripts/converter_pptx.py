@@ -1,15 +1,24 @@
+import io
 import os
-import sys
 import logging
 from pptx import Presentation
-from pptx.util import Inches
+from pptx.util import Inches, Pt
 import fitz  # PyMuPDF
-import tempfile
 import aspose.slides as slides
 
+from scripts.render_pool import iter_render_pages
+
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# PDF -> PPTX slide images: JPEG keeps image-heavy decks small, PNG is lossless for line art.
+SLIDE_IMAGE_FORMATS = ("jpg", "png")
+SLIDE_DPI = int(os.environ.get("PPTX_SLIDE_DPI", 150))
+MIN_SLIDE_DPI, MAX_SLIDE_DPI = 36, 300
+SLIDE_JPEG_QUALITY = 85
+# PowerPoint only accepts slide sides between 1 and 56 inches
+MIN_SLIDE_SIDE, MAX_SLIDE_SIDE = Inches(1), Inches(56)
+
 def convert_pptx_to_pdf(input_path: str, output_path: str):
     """
     Converts a PPTX file to PDF using aspose.slides (cross-platform, cloud-friendly).
@@ -35,15 +44,34 @@ def convert_pptx_to_pdf(input_path: str, output_path: str):
         raise RuntimeError(f"aspose.slides error: {str(e)}")
 
 
-def convert_pdf_to_pptx(input_path: str, output_path: str):
+def _slide_size(width: float, height: float) -> tuple[int, int]:
     """
-    Converts a PDF file to PPTX using PyMuPDF to extract images and python-pptx to assemble slides.
+    Slide size in EMU for a page of width x height points: the page's own size, scaled
+    (keeping the aspect ratio) into the range PowerPoint accepts.
+    """
+    slide_width, slide_height = Pt(width), Pt(height)
+    scale = min(1.0, MAX_SLIDE_SIDE / max(slide_width, slide_height))
+    scale = max(scale, MIN_SLIDE_SIDE / min(slide_width, slide_height))
+    return round(slide_width * scale), round(slide_height * scale)
+
+
+def convert_pdf_to_pptx(input_path: str, output_path: str, image_format: str = None, dpi: int = None):
+    """
+    Converts a PDF file to PPTX, one picture slide per page. Pages are rendered to JPEG
+    or PNG at `dpi` in memory across the render pool, and the slide size follows the first
+    page's aspect ratio (other pages are fitted and centered).
     """
     input_path = os.path.abspath(input_path)
     output_path = os.path.abspath(output_path)
+    image_format = (image_format or "jpg").lower()
+    dpi = dpi or SLIDE_DPI
+    if image_format not in SLIDE_IMAGE_FORMATS:
+        raise ValueError(f"Unsupported slide image format: {image_format}")
+    if not MIN_SLIDE_DPI <= dpi <= MAX_SLIDE_DPI:
+        raise ValueError(f"Slide DPI must be between {MIN_SLIDE_DPI} and {MAX_SLIDE_DPI}.")
     
     try:
-        logger.info(f"Starting PDF to PPTX conversion. Input: {input_path}, Output: {output_path}")
+        logger.info(f"Starting PDF to PPTX conversion ({image_format}, {dpi} dpi). Input: {input_path}, Output: {output_path}")
         prs = Presentation()
         # Remove default empty slide
         xml_slides = prs.slides._sldIdLst  
@@ -56,26 +84,21 @@ def convert_pdf_to_pptx(input_path: str, output_path: str):
                 doc.authenticate('')
                 if doc.needs_pass:
                     raise RuntimeError("PDF is encrypted and cannot be processed.")
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
-                for page_num in range(len(doc)):
-                    page = doc.load_page(page_num)
-                    zoom = 2.0  # High quality
-                    mat = fitz.Matrix(zoom, zoom)
-                    pix = page.get_pixmap(matrix=mat, alpha=False)
-                    
-                    img_path = os.path.join(temp_dir, f"page_{page_num}.png")
-                    pix.save(img_path)
-                    
-                    # Create a blank slide layout
-                    blank_slide_layout = prs.slide_layouts[6]
-                    slide = prs.slides.add_slide(blank_slide_layout)
-                    
-                    # Add picture to fill the slide
-                    left = top = Inches(0)
-                    width = prs.slide_width
-                    height = prs.slide_height
-                    slide.shapes.add_picture(img_path, left, top, width, height)
+            page_sizes = [(page.rect.width, page.rect.height) for page in doc]
+
+        if page_sizes:
+            prs.slide_width, prs.slide_height = _slide_size(*page_sizes[0])
+        blank_slide_layout = prs.slide_layouts[6]
+
+        images = iter_render_pages(input_path, None, zoom=dpi / 72, fmt=image_format, jpg_quality=SLIDE_JPEG_QUALITY)
+        for (page_width, page_height), data in zip(page_sizes, images):
+            slide = prs.slides.add_slide(blank_slide_layout)
+
+            # Fit the picture to the slide, centered, without distorting it
+            scale = min(prs.slide_width / page_width, prs.slide_height / page_height)
+            width, height = round(page_width * scale), round(page_height * scale)
+            left, top = (prs.slide_width - width) // 2, (prs.slide_height - height) // 2
+            slide.shapes.add_picture(io.BytesIO(data), left, top, width, height)
                     
         prs.save(output_path)
         
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    token TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    members TEXT
+);
+CREATE INDEX IF NOT EXISTS downloads_path ON downloads (path);
+"""
+
+
+class DownloadIndex:
+    """
+    Maps unguessable download tokens to result files. Lookups hit an in-memory LRU map
+    first and fall back to SQLite, so tokens issued by job workers or before a restart
+    still resolve with a single query instead of a directory walk.
+
+    A result can also be a list of member files that is served as a ZIP streamed on the
+    fly, so multi-file results never need a second, zipped copy on disk.
+    """
+
+    def __init__(self, db_path: str, memory_entries: int = 10000):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(downloads)")}
+            if "members" not in columns:
+                conn.execute("ALTER TABLE downloads ADD COLUMN members TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _remember(self, token: str, entry: tuple):
+        with self._lock:
+            self._memory[token] = entry
+            self._memory.move_to_end(token)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def register(self, path: str, filename: str = None, members: list[str] = None) -> str:
+        """
+        Registers a result file (or, with members, a ZIP of those files) and returns
+        the token to download it with.
+        """
+        token = secrets.token_urlsafe(16)
+        filename = filename or os.path.basename(path)
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO downloads (token, path, filename, created_at, members) VALUES (?, ?, ?, ?, ?)",
+                (token, path, filename, time.time(), json.dumps(members) if members else None),
+            )
+        finally:
+            conn.close()
+        self._remember(token, (path, filename, members))
+        return token
+
+    def lookup(self, token: str) -> tuple[str, str, list[str] | None] | None:
+        """
+        Returns (path, download filename, members) for a token, or None if it is unknown.
+        """
+        with self._lock:
+            entry = self._memory.get(token)
+            if entry is not None:
+                self._memory.move_to_end(token)
+                return entry
+
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT path, filename, members FROM downloads WHERE token = ?", (token,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        entry = (row[0], row[1], json.loads(row[2]) if row[2] else None)
+        self._remember(token, entry)
+        return entry
+
+    def forget_paths(self, paths: list[str]):
+        """
+        Drops every token that points at one of the given paths (e.g. after cleanup).
+        """
+        if not paths:
+            return
+        path_set = set(paths)
+        with self._lock:
+            for token in [t for t, entry in self._memory.items() if entry[0] in path_set]:
+                del self._memory[token]
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM downloads WHERE path = ?", [(p,) for p in path_set])
+        finally:
+            conn.close()
+
+    def purge(self, max_age_seconds: float):
+        """
+        Deletes tokens older than max_age_seconds from the persistent store.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM downloads WHERE created_at < ?", (time.time() - max_age_seconds,))
+        finally:
+            conn.close()
@@ -0,0 +1,137 @@
+import os
+import time
+import shutil
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expiries (
+    path TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS expiries_expires_at ON expiries (expires_at);
+"""
+
+
+def delete_path(path: str) -> bool:
+    """
+    Removes a file or a whole job directory. Returns True if something was deleted.
+    """
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+        else:
+            return False
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to delete {path}: {e}")
+        return False
+
+
+class ExpiryStore:
+    """
+    On-disk expiry table for uploaded and converted artifacts. One periodic sweep
+    replaces a sleeping coroutine per request, and pending deletions survive restarts.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def schedule(self, paths: list[str], delay_seconds: float):
+        """
+        Marks paths for deletion after delay_seconds. A path that is already scheduled
+        keeps the later of the two deadlines.
+        """
+        expires_at = time.time() + delay_seconds
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT INTO expiries (path, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET expires_at = MAX(expires_at, excluded.expires_at)",
+                [(os.path.abspath(p), expires_at) for p in paths if p],
+            )
+        finally:
+            conn.close()
+
+    def _take(self, query: str, args: tuple) -> list[str]:
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute(query, args).fetchall()]
+        finally:
+            conn.close()
+
+    def _forget(self, paths: list[str]):
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM expiries WHERE path = ?", [(p,) for p in paths])
+        finally:
+            conn.close()
+
+    def sweep(self, now: float = None) -> list[str]:
+        """
+        Deletes every artifact whose deadline has passed and returns their paths.
+        """
+        due = self._take("SELECT path FROM expiries WHERE expires_at <= ?", (now or time.time(),))
+        for path in due:
+            delete_path(path)
+        self._forget(due)
+        return due
+
+    def evict_for_space(self, directory: str, min_free_bytes: int, batch: int = 20) -> list[str]:
+        """
+        While free disk space under `directory` is below min_free_bytes, deletes the
+        artifacts closest to expiry first, in batches. Returns the evicted paths.
+        """
+        evicted = []
+        while shutil.disk_usage(directory).free < min_free_bytes:
+            paths = self._take("SELECT path FROM expiries ORDER BY expires_at LIMIT ?", (batch,))
+            if not paths:
+                break
+            for path in paths:
+                delete_path(path)
+            self._forget(paths)
+            evicted.extend(paths)
+        if evicted:
+            logger.warning(f"Low disk space: evicted {len(evicted)} artifact(s) early.")
+        return evicted
+
+    def reap_orphans(self, directories: list[str], max_age_seconds: float) -> list[str]:
+        """
+        Startup recovery: deletes untracked entries in the given directories whose mtime
+        is older than max_age_seconds (left over from crashes or pre-sweeper deployments).
+        """
+        tracked = set(self._take("SELECT path FROM expiries", ()))
+        cutoff = time.time() - max_age_seconds
+        reaped = []
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    path = os.path.abspath(entry.path)
+                    if path in tracked:
+                        continue
+                    try:
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                    except OSError:
+                        continue
+                    if mtime < cutoff and delete_path(path):
+                        reaped.append(path)
+        if reaped:
+            logger.info(f"Reaped {len(reaped)} orphaned artifact(s).")
+        return reaped
@@ -0,0 +1,56 @@
+import os
+import asyncio
+import hashlib
+from typing import NamedTuple
+
+import magic
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+SNIFF_SIZE = 8 * 1024  # libmagic only needs the first few KB
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class IngestedFile(NamedTuple):
+    path: str
+    size: int
+    mime_type: str
+    sha256: str
+
+
+async def stream_upload_to_disk(upload, dest_path: str, max_size: int) -> IngestedFile:
+    """
+    Copies an UploadFile to dest_path chunk by chunk while hashing it and sniffing its
+    MIME type from the first bytes. Peak memory is one chunk regardless of file size.
+    Hashing and disk writes run on the loop's executor so large uploads don't stall it.
+    Raises UploadTooLarge (and removes the partial file) as soon as max_size is exceeded.
+    """
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+
+    def store(f, chunk: bytes):
+        digest.update(chunk)
+        f.write(chunk)
+
+    try:
+        with open(dest_path, "wb") as f:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes.")
+                if len(head) < SNIFF_SIZE:
+                    head += chunk[:SNIFF_SIZE - len(head)]
+                await asyncio.to_thread(store, f, chunk)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    mime_type = magic.from_buffer(head, mime=True) if head else "application/x-empty"
+    return IngestedFile(dest_path, size, mime_type, digest.hexdigest())
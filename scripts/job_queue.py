@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# Params that must not outlive the job (e.g. the /protect/ and /unlock/ passwords): they are
+# stored apart from the other params and wiped as soon as the job finishes.
+SECRET_PARAMS = ("password",)
+MAX_JOB_ATTEMPTS = 3  # a job whose worker died this many times is failed instead of requeued
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    operation TEXT NOT NULL,
+    params TEXT NOT NULL,
+    secrets TEXT,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    worker_pid INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA secure_delete=ON")  # wiped secrets are overwritten on disk, not just unlinked
+    return conn
+
+
+def init_queue(db_path: str):
+    """
+    Creates the job table if it doesn't exist yet.
+    """
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = _connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+        # Queues created before these columns existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "secrets" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN secrets TEXT")
+        if "attempts" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    finally:
+        conn.close()
+
+
+def enqueue_job(db_path: str, operation: str, params: dict) -> str:
+    """
+    Stores a new job in the queue and returns its id.
+    """
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    secrets = {name: params[name] for name in SECRET_PARAMS if name in params}
+    public = {name: value for name, value in params.items() if name not in secrets}
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, operation, params, secrets, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, operation, json.dumps(public), json.dumps(secrets) if secrets else None, STATUS_QUEUED, now, now),
+        )
+    finally:
+        conn.close()
+    return job_id
+
+
+def claim_next_job(db_path: str) -> dict | None:
+    """
+    Atomically moves the oldest queued job to running and returns it.
+    Returns None if the queue is empty.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id, operation, params, secrets FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+            (STATUS_QUEUED,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker_pid = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (STATUS_RUNNING, os.getpid(), time.time(), row["id"]),
+        )
+        conn.execute("COMMIT")
+        params = json.loads(row["params"])
+        params.update(json.loads(row["secrets"]) if row["secrets"] else {})
+        return {"id": row["id"], "operation": row["operation"], "params": params}
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _finish_job(db_path: str, job_id: str, status: str, result: dict = None, error: str = None):
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, secrets = NULL, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+    finally:
+        conn.close()
+
+
+def complete_job(db_path: str, job_id: str, result: dict):
+    _finish_job(db_path, job_id, STATUS_DONE, result=result)
+
+
+def fail_job(db_path: str, job_id: str, error: str):
+    _finish_job(db_path, job_id, STATUS_FAILED, error=error)
+
+
+def update_job_progress(db_path: str, job_id: str, progress: dict):
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(progress), time.time(), job_id),
+        )
+    finally:
+        conn.close()
+
+
+def get_job(db_path: str, job_id: str) -> dict | None:
+    """
+    Returns the public state of a job, or None if the id is unknown.
+    """
+    conn = _connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT id, operation, status, result, error, progress, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {
+        "id": row["id"],
+        "operation": row["operation"],
+        "status": row["status"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "progress": json.loads(row["progress"]) if row["progress"] else None,
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def requeue_orphaned_jobs(db_path: str) -> int:
+    """
+    Puts running jobs whose worker process no longer exists back into the queue.
+    Called on startup and whenever a dead worker is replaced, so a crash or redeploy doesn't
+    leave jobs stuck in 'running'. Jobs that already took MAX_JOB_ATTEMPTS workers down with
+    them are failed instead.
+    """
+    conn = _connect(db_path)
+    requeued = failed = 0
+    try:
+        rows = conn.execute("SELECT id, worker_pid, attempts FROM jobs WHERE status = ?", (STATUS_RUNNING,)).fetchall()
+        for row in rows:
+            if row["worker_pid"] and _pid_alive(row["worker_pid"]):
+                continue
+            if row["attempts"] >= MAX_JOB_ATTEMPTS:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, secrets = NULL, worker_pid = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ?",
+                    (STATUS_FAILED, "İşlem sırasında çalışan süreç beklenmedik şekilde sonlandı.", time.time(),
+                     row["id"], STATUS_RUNNING),
+                )
+                failed += 1
+                continue
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = NULL, updated_at = ? WHERE id = ? AND status = ?",
+                (STATUS_QUEUED, time.time(), row["id"], STATUS_RUNNING),
+            )
+            requeued += 1
+    finally:
+        conn.close()
+    if requeued:
+        logger.warning(f"Requeued {requeued} orphaned job(s).")
+    if failed:
+        logger.warning(f"Failed {failed} job(s) that kept killing their workers.")
+    return requeued
+
+
+def purge_finished_jobs(db_path: str, max_age_seconds: int):
+    """
+    Deletes done/failed job records older than max_age_seconds.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (STATUS_DONE, STATUS_FAILED, time.time() - max_age_seconds),
+        )
+    finally:
+        conn.close()
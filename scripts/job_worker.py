@@ -0,0 +1,102 @@
+import os
+import time
+import signal
+import logging
+import multiprocessing
+
+from scripts.job_queue import claim_next_job, complete_job, fail_job, requeue_orphaned_jobs, update_job_progress
+from scripts.download_index import DownloadIndex
+from scripts.converter_daemon import pool_size_overrides
+
+logger = logging.getLogger(__name__)
+
+_stop = False
+
+
+def _handle_stop(signum, frame):
+    global _stop
+    _stop = True
+
+
+def worker_main(db_path: str, downloads_db: str, poll_interval: float = 0.5, env: dict = None):
+    """
+    Worker process loop: claims queued jobs and runs them through the task registry.
+    env (pool sizes, see _worker_env) is applied before the task modules load.
+    Jobs run like inline requests (see run_task_in_worker), so one that exceeds TASK_TIMEOUT
+    has its task daemon killed and is marked failed instead of blocking the worker.
+    """
+    signal.signal(signal.SIGTERM, _handle_stop)
+    os.environ.update(env or {})
+    # Imported here so the heavy converter modules load once per worker process, not in the parent.
+    from scripts.tasks import run_task_in_worker, shutdown_daemon_pools
+    download_index = DownloadIndex(downloads_db)
+
+    logger.info(f"Job worker {os.getpid()} started.")
+    while not _stop:
+        job = claim_next_job(db_path)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            result = run_task_in_worker(job["operation"], job["params"],
+                                        on_progress=lambda progress: update_job_progress(db_path, job["id"], progress))
+            filename = job["params"].get("display_name") or os.path.basename(result["output_path"])
+            token = download_index.register(result["output_path"], filename, result.get("members"))
+            result["download_url"] = f"/download/{token}"
+            result["converted_filename"] = filename
+            result.pop("output_path", None)
+            result.pop("members", None)
+            complete_job(db_path, job["id"], result)
+        except Exception as e:
+            logger.exception(f"Job {job['id']} ({job['operation']}) failed: {e}")
+            fail_job(db_path, job["id"], str(e))
+
+    shutdown_daemon_pools()
+    logger.info(f"Job worker {os.getpid()} stopped.")
+
+
+def start_workers(db_path: str, downloads_db: str, count: int) -> list[multiprocessing.Process]:
+    """
+    Starts `count` worker processes. Running jobs left behind by dead workers are requeued first.
+    """
+    requeue_orphaned_jobs(db_path)
+    return [_start_worker(db_path, downloads_db, count) for _ in range(count)]
+
+
+def _worker_env(count: int) -> dict:
+    # A worker runs one job at a time: one task daemon, with the worker's share of the cores
+    return dict(pool_size_overrides(count), TASK_WORKERS="1")
+
+
+def _start_worker(db_path: str, downloads_db: str, count: int) -> multiprocessing.Process:
+    # Not daemonic: tasks may start their own process pools.
+    p = multiprocessing.get_context("spawn").Process(
+        target=worker_main, args=(db_path, downloads_db, 0.5, _worker_env(count)), daemon=False)
+    p.start()
+    return p
+
+
+def restart_dead_workers(workers: list[multiprocessing.Process], db_path: str, downloads_db: str) -> int:
+    """
+    Replaces workers that exited (crash, OOM kill, ...) in place and requeues the jobs they
+    were running. Returns the number of workers restarted.
+    """
+    dead = [i for i, p in enumerate(workers) if not p.is_alive()]
+    for i in dead:
+        logger.warning(f"Job worker {workers[i].pid} exited with code {workers[i].exitcode}, restarting.")
+        workers[i].join(0)
+        workers[i] = _start_worker(db_path, downloads_db, len(workers))
+    if dead:
+        requeue_orphaned_jobs(db_path)
+    return len(dead)
+
+
+def stop_workers(workers: list[multiprocessing.Process], timeout: float = 10):
+    for p in workers:
+        if p.is_alive():
+            p.terminate()
+    for p in workers:
+        p.join(timeout)
+        if p.is_alive():
+            p.kill()
@@ -0,0 +1,52 @@
+def parse_page_range(spec: str | None, page_count: int) -> list[int]:
+    """
+    Turns a 1-based page spec such as "all", "3", "1-5" or "1,4,7-9" into
+    0-based page numbers. Raises ValueError for malformed or out-of-range specs.
+    """
+    spec = (spec or "").strip().lower()
+    if spec in ("", "all"):
+        return list(range(page_count))
+
+    pages = []
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        first = int(start)
+        last = int(end) if end else first
+        if first < 1 or last > page_count or first > last:
+            raise ValueError(f"Page range '{part.strip()}' is outside 1-{page_count}.")
+        pages.extend(range(first - 1, last))
+    return list(dict.fromkeys(pages))
+
+
+def page_runs(page_numbers: list[int]) -> list[tuple[int, int]]:
+    """
+    Groups page numbers into (first, last) runs of consecutive pages, e.g.
+    [0, 1, 2, 5, 6] -> [(0, 2), (5, 6)].
+    """
+    runs = []
+    for page in page_numbers:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+    return runs
+
+
+def page_groups(page_count: int, mode: str, ranges: str = None, every: int = None) -> list[list[int]]:
+    """
+    Page groups for the split modes that only depend on the page count:
+    pages (one per page), ranges (';'-separated page specs) and every (N pages each).
+    """
+    if mode == "pages":
+        return [[i] for i in range(page_count)]
+    if mode == "ranges":
+        groups = [parse_page_range(spec, page_count) for spec in (ranges or "").split(";") if spec.strip()]
+        # Same pages -> same output file name; a repeat would overwrite the first and be listed twice
+        if len({tuple(group) for group in groups}) != len(groups):
+            raise ValueError("Each page range may only be given once.")
+        return groups
+    if mode == "every":
+        if not every or every < 1:
+            raise ValueError("every must be a positive number of pages.")
+        return [list(range(i, min(i + every, page_count))) for i in range(0, page_count, every)]
+    raise ValueError(f"Unknown split mode: {mode}")
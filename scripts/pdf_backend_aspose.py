@@ -0,0 +1,36 @@
+import aspose.pdf as ap
+
+def compress_pdf(input_path: str, output_path: str, level: str = 'medium'):
+    """
+    Compresses a PDF file using Aspose.PDF to control image_quality.
+    Levels: 
+    - low: Image quality 90 (High Quality)
+    - medium: Image quality 60 (Recommended)
+    - high: Image quality 30 (Small Size)
+    """
+    doc = ap.Document(input_path)
+    optimization_options = ap.optimization.OptimizationOptions()
+    
+    optimization_options.link_duprates = True
+    optimization_options.remove_unused_objects = True
+    optimization_options.remove_unused_streams = True
+    optimization_options.image_compression_options.compress_images = True
+    
+    if level == 'high':
+        optimization_options.image_compression_options.image_quality = 30
+        optimization_options.image_compression_options.resize_images = True
+        optimization_options.image_compression_options.max_resolution = 150
+    elif level == 'low':
+        optimization_options.image_compression_options.image_quality = 90
+        optimization_options.image_compression_options.resize_images = False
+    else: # medium (default)
+        optimization_options.image_compression_options.image_quality = 60
+        optimization_options.image_compression_options.resize_images = True
+        optimization_options.image_compression_options.max_resolution = 200
+
+    doc.optimize_resources(optimization_options)
+    doc.save(output_path)
+
+OPERATIONS = {
+    "compress": compress_pdf,
+}
@@ -0,0 +1,148 @@
+import fitz  # PyMuPDF
+
+from scripts.page_ranges import parse_page_range, page_runs
+from scripts.pdf_backends import watermark_stamp, watermark_style_key
+from scripts.pdf_split import split_pdf
+from scripts.pdf_compress import compress_pdf
+
+def _normalize_toc(toc: list[list]) -> list[list]:
+    """
+    Fixes outline levels after entries were dropped (e.g. by page ranges): the first
+    entry must be level 1 and no entry may be more than one level below its predecessor.
+    """
+    normalized = []
+    previous = 0
+    for level, title, page in toc:
+        level = max(1, min(level, previous + 1))
+        normalized.append([level, title, page])
+        previous = level
+    return normalized
+
+def merge_pdfs(input_paths: list[str], output_path: str, page_ranges: list[str] = None):
+    """
+    Merges multiple PDF files into one using PyMuPDF.
+    page_ranges optionally holds a 1-based page spec per input ("1-3,7"; empty = all pages).
+    Outlines pointing at merged pages are kept, and identical streams shared across
+    inputs (fonts, logos, letterheads) are written only once.
+    """
+    page_ranges = page_ranges or [None] * len(input_paths)
+    if len(page_ranges) != len(input_paths):
+        raise ValueError("page_ranges must have one entry per input file.")
+
+    with fitz.open() as merged:
+        toc = []
+        for path, spec in zip(input_paths, page_ranges):
+            with fitz.open(path) as src:
+                pages = parse_page_range(spec, len(src))
+                new_page_numbers = {page: len(merged) + i for i, page in enumerate(pages)}
+                for first, last in page_runs(pages):
+                    merged.insert_pdf(src, from_page=first, to_page=last)
+                for level, title, page in src.get_toc(simple=True):
+                    if page - 1 in new_page_numbers:
+                        toc.append([level, title, new_page_numbers[page - 1] + 1])
+
+        merged.set_toc(_normalize_toc(toc))
+        # garbage=4 also compares stream contents, so duplicated fonts/images collapse into one object
+        merged.save(output_path, garbage=4, deflate=True)
+
+def _indirect_xref(value: str) -> int:
+    return int(value.split()[0])  # "12 0 R" -> 12
+
+def _reuse_stamp(doc: fitz.Document, page: fitz.Page, name: str, form_xref: int, content_xref: int) -> bool:
+    """
+    Points the page at an already placed stamp: adds `name` -> form_xref to its XObject
+    resources and appends the shared ' q /name Do Q ' stream to its contents. Returns False
+    (caller falls back to show_pdf_page) when the resources are inherited or the name is taken.
+    """
+    kind, value = doc.xref_get_key(page.xref, "Resources")
+    if kind == "xref":
+        owner, path = _indirect_xref(value), "XObject"
+    elif kind == "dict":
+        owner, path = page.xref, "Resources/XObject"
+    else:
+        return False
+    kind, value = doc.xref_get_key(owner, path)
+    if kind == "xref":
+        owner, path = _indirect_xref(value), ""
+    key = f"{path}/{name}" if path else name
+
+    kind, value = doc.xref_get_key(owner, key)
+    if kind != "null" and value != f"{form_xref} 0 R":
+        return False
+    if not page.is_wrapped:
+        page.wrap_contents()
+    doc.xref_set_key(owner, key, f"{form_xref} 0 R")
+    contents = page.get_contents() + [content_xref]
+    doc.xref_set_key(page.xref, "Contents", "[" + " ".join(f"{x} 0 R" for x in contents) + "]")
+    return True
+
+def watermark_pdf(input_path: str, output_path: str, watermark_text: str, style: dict = None):
+    """
+    Adds a watermark text to all pages of a PDF file.
+    The stamp is built once per distinct page size and shared as one Form XObject: pages with
+    the same geometry reference the same XObject and the same one-line content stream.
+    """
+    style_key = watermark_style_key(style)
+    stamps = {}
+    placed = {}
+    with fitz.open(input_path) as doc:
+        for page in doc:
+            geometry = (tuple(page.rect), tuple(page.mediabox), page.rotation)
+            if geometry in placed and _reuse_stamp(doc, page, *placed[geometry]):
+                continue
+
+            size = (round(page.rect.width, 2), round(page.rect.height, 2))
+            if size not in stamps:
+                stamps[size] = fitz.open("pdf", watermark_stamp(watermark_text, *size, style_key))
+            # page.rect is the page as displayed; place the stamp in unrotated coordinates
+            # and turn it with the page so it reads upright on rotated pages too
+            page.show_pdf_page(page.rect * page.derotation_matrix, stamps[size], 0,
+                               overlay=True, rotate=page.rotation)
+            # show_pdf_page appends a ' q /fzFrmN Do Q ' stream invoking a small wrapper form
+            content_xref = page.get_contents()[-1]
+            name = doc.xref_stream(content_xref).split()[1].decode()[1:]
+            form_xref = next(x[0] for x in page.get_xobjects() if x[1] == name)
+            placed[geometry] = (name, form_xref, content_xref)
+        doc.save(output_path, garbage=1)
+    for stamp in stamps.values():
+        stamp.close()
+
+def rotate_pdf(input_path: str, output_path: str, degrees: int = 90):
+    """
+    Rotates all pages clockwise by setting /Rotate; page contents are left untouched.
+    """
+    with fitz.open(input_path) as doc:
+        for page in doc:
+            page.set_rotation((page.rotation + degrees) % 360)
+        doc.save(output_path, garbage=1)
+
+def encrypt_pdf(input_path: str, output_path: str, password: str):
+    """
+    Encrypts a PDF file with a password (AES-256), saving the document directly.
+    """
+    with fitz.open(input_path) as doc:
+        doc.save(output_path, encryption=fitz.PDF_ENCRYPT_AES_256, user_pw=password, owner_pw=password)
+
+def decrypt_pdf(input_path: str, output_path: str, password: str):
+    """
+    Decrypts a PDF file with its user or owner password.
+    Raises ValueError if password is wrong or PDF is not encrypted.
+    """
+    with fitz.open(input_path) as doc:
+        # Files locked only by an owner (permissions) password open without one, so
+        # needs_pass/is_encrypted are false for them; the encryption metadata still says so
+        if not doc.needs_pass and not (doc.metadata or {}).get("encryption"):
+            raise ValueError("Bu PDF dosyası şifreli değil.")
+        if not doc.authenticate(password):
+            raise ValueError("Hatalı şifre girdiniz.")
+        doc.save(output_path, encryption=fitz.PDF_ENCRYPT_NONE)
+
+OPERATIONS = {
+    "merge": merge_pdfs,
+    "split": split_pdf,
+    "rotate": rotate_pdf,
+    "watermark": watermark_pdf,
+    "encrypt": encrypt_pdf,
+    "decrypt": decrypt_pdf,
+    "compress": compress_pdf,
+}
@@ -0,0 +1,124 @@
+import os
+import io
+from PyPDF2 import PdfReader, PdfWriter, PdfMerger
+
+from scripts.page_ranges import parse_page_range, page_groups
+from scripts.pdf_split import _split_filename
+from scripts.pdf_backends import watermark_stamp, watermark_style_key
+
+def merge_pdfs(input_paths: list[str], output_path: str, page_ranges: list[str] = None):
+    """
+    Merges multiple PDF files into one with PyPDF2's PdfMerger.
+    """
+    page_ranges = page_ranges or [None] * len(input_paths)
+    merger = PdfMerger()
+    for path, spec in zip(input_paths, page_ranges):
+        if spec:
+            merger.append(path, pages=parse_page_range(spec, len(PdfReader(path).pages)))
+        else:
+            merger.append(path)
+
+    merger.write(output_path)
+    merger.close()
+
+def split_pdf(input_path: str, output_dir: str, base_name: str, mode: str = "pages",
+              ranges: str = None, every: int = None, max_bytes: int = None) -> list[str]:
+    """
+    Splits a PDF file with one PdfWriter per output file. The size mode is only
+    available on the PyMuPDF backend.
+    """
+    if mode == "size":
+        raise ValueError("The size split mode needs the pymupdf backend.")
+    reader = PdfReader(input_path)
+    output_files = []
+
+    for index, pages in enumerate(page_groups(len(reader.pages), mode, ranges, every)):
+        writer = PdfWriter()
+        for i in pages:
+            writer.add_page(reader.pages[i])
+
+        output_filepath = os.path.join(output_dir, _split_filename(base_name, pages, index))
+
+        with open(output_filepath, "wb") as f:
+            writer.write(f)
+
+        output_files.append(output_filepath)
+
+    return output_files
+
+def rotate_pdf(input_path: str, output_path: str, degrees: int = 90):
+    """
+    Rotates all pages in a PDF file clockwise by the specified degrees.
+    """
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        page.rotate(degrees)
+        writer.add_page(page)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+def watermark_pdf(input_path: str, output_path: str, watermark_text: str, style: dict = None):
+    """
+    Merges a watermark stamp (one per distinct page size) into every page's content stream.
+    """
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+    style_key = watermark_style_key(style)
+    stamps = {}
+
+    for page in reader.pages:
+        size = (round(float(page.mediabox.width), 2), round(float(page.mediabox.height), 2))
+        if size not in stamps:
+            stamps[size] = PdfReader(io.BytesIO(watermark_stamp(watermark_text, *size, style_key))).pages[0]
+        page.merge_page(stamps[size])
+        writer.add_page(page)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+def encrypt_pdf(input_path: str, output_path: str, password: str):
+    """
+    Encrypts a PDF file with a password.
+    """
+    reader = PdfReader(input_path)
+    writer = PdfWriter()
+
+    for page in reader.pages:
+        writer.add_page(page)
+
+    writer.encrypt(password)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+def decrypt_pdf(input_path: str, output_path: str, password: str):
+    """
+    Decrypts a PDF file with a password.
+    Raises ValueError if password is wrong or PDF is not encrypted.
+    """
+    reader = PdfReader(input_path)
+
+    if not reader.is_encrypted:
+        raise ValueError("Bu PDF dosyası şifreli değil.")
+
+    if not reader.decrypt(password):
+        raise ValueError("Hatalı şifre girdiniz.")
+
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+OPERATIONS = {
+    "merge": merge_pdfs,
+    "split": split_pdf,
+    "rotate": rotate_pdf,
+    "watermark": watermark_pdf,
+    "encrypt": encrypt_pdf,
+    "decrypt": decrypt_pdf,
+}
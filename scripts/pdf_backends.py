@@ -0,0 +1,147 @@
+import os
+import io
+import json
+import logging
+import importlib
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Each backend module exposes OPERATIONS = {operation name: function}. Modules are imported
+# lazily, so a missing library (e.g. aspose) only disables that backend.
+BACKEND_MODULES = {
+    "pymupdf": "scripts.pdf_backend_pymupdf",
+    "pypdf2": "scripts.pdf_backend_pypdf2",
+    "aspose": "scripts.pdf_backend_aspose",
+}
+
+# Preference order per operation when nothing is configured and no benchmark results exist.
+# Picked from `python -m scripts.benchmark_pdf_backends` (numbers in that module's docstring):
+# PyMuPDF wins every operation it implements. Aspose is an optional fallback for compress
+# only and is not offered elsewhere (unlicensed it stamps outputs).
+DEFAULT_BACKENDS = {
+    "merge": ["pymupdf", "pypdf2"],
+    "split": ["pymupdf", "pypdf2"],
+    "rotate": ["pymupdf", "pypdf2"],
+    "watermark": ["pymupdf", "pypdf2"],
+    "encrypt": ["pymupdf", "pypdf2"],
+    "decrypt": ["pymupdf", "pypdf2"],
+    "compress": ["pymupdf", "aspose"],
+}
+
+# e.g. PDF_BACKENDS="merge=pypdf2,compress=aspose"; unlisted operations (or "auto") are picked
+# automatically: fastest verified backend from the benchmark file, else DEFAULT_BACKENDS order.
+PDF_BACKENDS = os.environ.get("PDF_BACKENDS", "")
+PDF_BACKEND_BENCHMARK = os.environ.get("PDF_BACKEND_BENCHMARK",
+                                       os.path.join(os.getcwd(), "state", "pdf_backend_benchmark.json"))
+
+_lock = threading.Lock()
+_selected = {}
+
+
+def _configured() -> dict:
+    configured = {}
+    for item in PDF_BACKENDS.split(","):
+        operation, _, backend = item.strip().partition("=")
+        if operation and backend:
+            configured[operation.strip()] = backend.strip().lower()
+    return configured
+
+
+@lru_cache(maxsize=None)
+def _load(backend: str) -> dict:
+    """
+    Returns the backend's operation table, or an empty one if its library isn't installed.
+    """
+    try:
+        return importlib.import_module(BACKEND_MODULES[backend]).OPERATIONS
+    except ImportError as e:
+        logger.info(f"PDF backend '{backend}' unavailable: {e}")
+        return {}
+
+
+def available_backends(operation: str) -> list[str]:
+    return [name for name in BACKEND_MODULES if operation in _load(name)]
+
+
+def _benchmark_ranking(operation: str) -> list[str]:
+    """
+    Backends ordered by median time from a saved benchmark run, only counting verified results.
+    """
+    try:
+        with open(PDF_BACKEND_BENCHMARK, "r", encoding="utf-8") as f:
+            results = json.load(f).get(operation, {})
+    except (OSError, ValueError):
+        return []
+    verified = [(r["seconds"], name) for name, r in results.items() if r.get("verified")]
+    return [name for _, name in sorted(verified)]
+
+
+def select_backend(operation: str) -> str:
+    """
+    Name of the backend used for an operation: the configured one if it is available,
+    otherwise the fastest verified one from the benchmark, otherwise the default order.
+    """
+    with _lock:
+        if operation in _selected:
+            return _selected[operation]
+
+    available = available_backends(operation)
+    if not available:
+        raise RuntimeError(f"No PDF backend available for '{operation}'.")
+
+    choice = _configured().get(operation, "auto")
+    if choice != "auto" and choice not in available:
+        logger.warning(f"PDF backend '{choice}' can't run '{operation}'; choosing automatically.")
+        choice = "auto"
+    if choice == "auto":
+        ranking = _benchmark_ranking(operation) + DEFAULT_BACKENDS.get(operation, []) + available
+        choice = next(name for name in ranking if name in available)
+
+    with _lock:
+        _selected[operation] = choice
+    logger.info(f"PDF backend for '{operation}': {choice}")
+    return choice
+
+
+def get_backend(operation: str, backend: str = None):
+    """
+    The function implementing `operation`, from `backend` or the selected backend.
+    """
+    name = backend or select_backend(operation)
+    func = _load(name).get(operation)
+    if func is None:
+        raise RuntimeError(f"PDF backend '{name}' does not implement '{operation}'.")
+    return func
+
+
+WATERMARK_STYLE = {"font": "Helvetica-Bold", "font_size": 60, "gray": 0.5, "opacity": 0.3, "angle": 45}
+
+
+def watermark_style_key(style: dict = None) -> tuple:
+    return tuple(sorted({**WATERMARK_STYLE, **(style or {})}.items()))
+
+
+@lru_cache(maxsize=64)
+def watermark_stamp(text: str, width: float, height: float, style: tuple) -> bytes:
+    """
+    One-page PDF of the given size with the watermark text centered and rotated.
+    Cached by (text, size, style) so repeated watermarks don't redraw it.
+    """
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.colors import Color
+
+    style = dict(style)
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=(width, height))
+    can.setFillColor(Color(style["gray"], style["gray"], style["gray"], alpha=style["opacity"]))
+    can.setFont(style["font"], style["font_size"])
+    can.saveState()
+    can.translate(width / 2, height / 2)
+    can.rotate(style["angle"])
+    # drawCentredString centers horizontally on the baseline; lift it by a third of the size
+    can.drawCentredString(0, -style["font_size"] / 3, text)
+    can.restoreState()
+    can.save()
+    return packet.getvalue()
@@ -0,0 +1,306 @@
+import io
+import os
+import zlib
+import hashlib
+import logging
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageChops, ImageStat
+
+from scripts.render_pool import map_in_pool
+
+logger = logging.getLogger(__name__)
+
+# Same knobs as the Aspose levels: JPEG quality and a resolution cap for images.
+COMPRESS_LEVELS = {
+    "low": {"quality": 90, "max_dpi": None},
+    "medium": {"quality": 60, "max_dpi": 200},
+    "high": {"quality": 30, "max_dpi": 150},
+}
+MIN_IMAGE_BYTES = 8 * 1024  # smaller images aren't worth a round trip to the pool
+
+# Scan classification, on a nearest-neighbour probe so edges aren't blurred into mid-grays.
+# Bilevel images (text scans) are thresholded and stored as CCITT Group 4 instead of JPEG,
+# never below BILEVEL_MIN_DPI since 1-bit text degrades fast when downsampled.
+CLASSIFY_PROBE_SIZE = 256
+COLOR_SPREAD = 12  # mean max-min channel difference above which an image counts as color
+BILEVEL_RATIO = 0.95  # share of near-black/near-white pixels for a gray image to count as bilevel
+BILEVEL_MIN_DPI = 300
+
+# Target size mode: settings from best to smallest, and how many images to sample.
+TARGET_LADDER = [(90, 300), (80, 250), (70, 200), (60, 200), (50, 150), (40, 150), (30, 120), (25, 100), (20, 72)]
+TARGET_SAMPLE_IMAGES = 6
+TARGET_MAX_PASSES = 2
+
+
+def _display_inches(doc: fitz.Document) -> dict[int, tuple[float, float]]:
+    """
+    Largest size (in inches) each image xref is drawn at anywhere in the document.
+    """
+    sizes = {}
+    for page in doc:
+        for image in page.get_images(full=True):
+            xref = image[0]
+            for rect in page.get_image_rects(xref):
+                width, height = rect.width / 72, rect.height / 72
+                old_width, old_height = sizes.get(xref, (0, 0))
+                sizes[xref] = (max(width, old_width), max(height, old_height))
+    return sizes
+
+
+def _classify(image: Image.Image) -> str:
+    """
+    "bilevel", "gray" or "color", judged on a small nearest-neighbour probe of the image.
+    """
+    if image.mode == "1":
+        return "bilevel"
+    scale = min(1.0, CLASSIFY_PROBE_SIZE / max(image.width, image.height))
+    probe = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                         Image.NEAREST)
+    if probe.mode not in ("L", "LA", "I", "I;16"):
+        red, green, blue = probe.convert("RGB").split()
+        spread = ImageChops.difference(ImageChops.lighter(ImageChops.lighter(red, green), blue),
+                                       ImageChops.darker(ImageChops.darker(red, green), blue))
+        if ImageStat.Stat(spread).mean[0] > COLOR_SPREAD:
+            return "color"
+    histogram = probe.convert("L").histogram()
+    extremes = sum(histogram[:64]) + sum(histogram[192:])
+    return "bilevel" if extremes >= BILEVEL_RATIO * sum(histogram) else "gray"
+
+
+def _otsu_threshold(image: Image.Image) -> int:
+    """
+    Gray level that best separates ink from paper (Otsu's method on the histogram).
+    """
+    histogram = image.histogram()
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    best, best_variance = 128, -1.0
+    background, weighted_background = 0, 0
+    for level, count in enumerate(histogram):
+        background += count
+        weighted_background += level * count
+        foreground = total - background
+        if not background or not foreground:
+            continue
+        mean_gap = weighted_background / background - (weighted_total - weighted_background) / foreground
+        variance = background * foreground * mean_gap * mean_gap
+        if variance > best_variance:
+            best, best_variance = level, variance
+    return best
+
+
+def _encode_g4(image: Image.Image) -> bytes:
+    """
+    Raw CCITT Group 4 data for a 1-bit image: Pillow writes a single-strip TIFF and the
+    strip is cut out, which is exactly what a PDF /CCITTFaxDecode stream holds.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="TIFF", compression="group4", tiffinfo={278: image.height})  # RowsPerStrip
+    buffer.seek(0)
+    with Image.open(buffer) as tiff:
+        offset, length = tiff.tag_v2[273][0], tiff.tag_v2[279][0]  # StripOffsets, StripByteCounts
+    return buffer.getvalue()[offset:offset + length]
+
+
+def _downsample(image: Image.Image, display: tuple[float, float] | None, max_dpi: int | None) -> Image.Image:
+    if max_dpi and display and display[0] > 0 and display[1] > 0:
+        scale = min(1.0, max_dpi * display[0] / image.width, max_dpi * display[1] / image.height)
+        if scale < 0.99:  # a resample for a pixel or two costs more than it saves
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            image = image.resize(size, Image.LANCZOS)
+    return image
+
+
+def _recompress_image(data: bytes, display: tuple[float, float] | None, quality: int,
+                      max_dpi: int | None) -> tuple[bytes, int, int, str] | None:
+    """
+    Process pool worker: downsamples an image to max_dpi at its displayed size and
+    re-encodes it, bilevel images as CCITT G4 (mode "1") and the rest as JPEG.
+    Returns (encoded bytes, width, height, mode) or None if that wouldn't make it smaller.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        kind = _classify(image)
+        if kind == "bilevel":
+            image = image.convert("L")
+            image = _downsample(image, display, max(max_dpi, BILEVEL_MIN_DPI) if max_dpi else None)
+            threshold = _otsu_threshold(image)
+            image = image.point(lambda value: 255 if value > threshold else 0, mode="1")
+            encoded = _encode_g4(image)
+        else:
+            image = _downsample(image.convert("L" if kind == "gray" else "RGB"), display, max_dpi)
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=quality, optimize=True)
+            encoded = out.getvalue()
+    if len(encoded) >= len(data):
+        return None
+    return encoded, image.width, image.height, image.mode
+
+
+def _image_candidates(doc: fitz.Document) -> dict[int, dict]:
+    """
+    Image XObjects worth recompressing: 8-bit or plain 1-bit, not stencil masks, not already
+    tiny. 1-bit images already in a fax/JBIG2 encoding are left alone.
+    """
+    candidates = {}
+    for page in doc:
+        for xref, smask, width, height, bpc, colorspace, *_ in page.get_images(full=True):
+            if xref in candidates or bpc not in (1, 8):
+                continue
+            if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+                continue
+            if bpc == 1 and (doc.xref_get_key(xref, "Filter")[1] in ("/CCITTFaxDecode", "/JBIG2Decode")
+                             or doc.xref_get_key(xref, "Decode")[0] != "null"):
+                continue
+            if len(doc.xref_stream_raw(xref) or b"") < MIN_IMAGE_BYTES:
+                continue
+            candidates[xref] = {"width": width, "height": height}
+    return candidates
+
+
+def _write_image(doc: fitz.Document, xref: int, data: bytes, width: int, height: int, mode: str):
+    """
+    Swaps an image stream for JPEG (mode "L"/"RGB") or CCITT G4 (mode "1") data in place,
+    keeping its /SMask and other keys.
+    """
+    doc.update_stream(xref, data, compress=False)
+    doc.xref_set_key(xref, "Decode", "null")
+    doc.xref_set_key(xref, "Width", str(width))
+    doc.xref_set_key(xref, "Height", str(height))
+    if mode == "1":
+        doc.xref_set_key(xref, "Filter", "/CCITTFaxDecode")
+        # Pillow's 1-bit TIFFs are MinIsBlack, so set bits are black
+        doc.xref_set_key(xref, "DecodeParms", f"<</K -1 /Columns {width} /Rows {height} /BlackIs1 true>>")
+        doc.xref_set_key(xref, "BitsPerComponent", "1")
+    else:
+        doc.xref_set_key(xref, "Filter", "/DCTDecode")
+        doc.xref_set_key(xref, "DecodeParms", "null")
+        doc.xref_set_key(xref, "BitsPerComponent", "8")
+    doc.xref_set_key(xref, "ColorSpace", "/DeviceRGB" if mode == "RGB" else "/DeviceGray")
+
+
+def _unique_images(doc: fitz.Document) -> list[dict]:
+    """
+    One entry per distinct candidate image (identical streams grouped by hash): its xrefs,
+    raw size and the largest size any copy is drawn at.
+    """
+    display = _display_inches(doc)
+    by_hash = {}
+    for xref in _image_candidates(doc):
+        raw = doc.xref_stream_raw(xref)
+        entry = by_hash.setdefault(hashlib.sha256(raw).hexdigest(), {"xrefs": [], "raw_bytes": len(raw)})
+        entry["xrefs"].append(xref)
+    for entry in by_hash.values():
+        sizes = [display[x] for x in entry["xrefs"] if x in display]
+        entry["display"] = (max(s[0] for s in sizes), max(s[1] for s in sizes)) if sizes else None
+    return list(by_hash.values())
+
+
+def compress_pdf(input_path: str, output_path: str, level: str = 'medium', quality: int = None,
+                 max_dpi: int = None):
+    """
+    Compresses a PDF file without Aspose:
+    - image XObjects are downsampled to the level's resolution cap and re-encoded on the
+      process pool; identical images (same stream hash) are recompressed only once
+    - black-and-white scans are thresholded to 1 bit and stored as CCITT G4, grayscale and
+      color images as JPEG
+    - unused and duplicate objects are dropped (garbage=4) and all streams are deflated
+    quality/max_dpi override the level's values (used by the target size mode).
+    """
+    settings = dict(COMPRESS_LEVELS.get(level, COMPRESS_LEVELS["medium"]))
+    if quality is not None:
+        settings["quality"] = quality
+    if max_dpi is not None:
+        settings["max_dpi"] = max_dpi
+
+    with fitz.open(input_path) as doc:
+        images = _unique_images(doc)
+        jobs = [(doc.extract_image(entry["xrefs"][0])["image"], entry["display"], settings["quality"],
+                 settings["max_dpi"]) for entry in images]
+
+        replaced = 0
+        for entry, result in zip(images, map_in_pool(_recompress_image, jobs)):
+            if result is None:
+                continue
+            for xref in entry["xrefs"]:
+                _write_image(doc, xref, *result)
+            replaced += len(entry["xrefs"])
+        logger.info(f"Recompressed {replaced} image(s) in {len(jobs)} unique group(s) of {input_path}.")
+
+        # garbage=4 also merges the now identical duplicate image streams into one object
+        doc.save(output_path, garbage=4, deflate=True, use_objstms=1)
+
+
+def _other_bytes(doc: fitz.Document, image_xrefs: set[int]) -> int:
+    """
+    Approximate output size of everything but the recompressed images: object
+    dictionaries plus streams, with unfiltered streams counted as they'd be deflated.
+    """
+    total = 0
+    for xref in range(1, doc.xref_length()):
+        if xref in image_xrefs:
+            continue
+        total += len(doc.xref_object(xref, compressed=True))
+        if doc.xref_is_stream(xref):
+            raw = doc.xref_stream_raw(xref) or b""
+            total += len(raw) if doc.xref_get_key(xref, "Filter")[0] != "null" else len(zlib.compress(raw, 1))
+    return total
+
+
+def _estimate_ladder(input_path: str) -> list[int]:
+    """
+    Estimated output size for every TARGET_LADDER rung. A sample of the largest images is
+    recompressed at each rung (in parallel) and the resulting ratio is applied to all images.
+    """
+    with fitz.open(input_path) as doc:
+        images = _unique_images(doc)
+        sample = sorted(images, key=lambda entry: entry["raw_bytes"], reverse=True)[:TARGET_SAMPLE_IMAGES]
+        sample_data = [doc.extract_image(entry["xrefs"][0])["image"] for entry in sample]
+        other_bytes = _other_bytes(doc, {xref for entry in images for xref in entry["xrefs"]})
+    # Duplicates count once in the output, since the save merges identical streams
+    image_bytes = sum(entry["raw_bytes"] for entry in images)
+    if not sample:
+        return [other_bytes] * len(TARGET_LADDER)
+
+    jobs = [(data, entry["display"], quality, max_dpi)
+            for quality, max_dpi in TARGET_LADDER for entry, data in zip(sample, sample_data)]
+    results = map_in_pool(_recompress_image, jobs)
+    sample_raw = sum(entry["raw_bytes"] for entry in sample)
+
+    estimates = []
+    for rung in range(len(TARGET_LADDER)):
+        rung_results = results[rung * len(sample):(rung + 1) * len(sample)]
+        # An image that wouldn't shrink is kept as is
+        new_bytes = sum(len(r[0]) if r else entry["raw_bytes"] for entry, r in zip(sample, rung_results))
+        estimates.append(round(other_bytes + image_bytes * new_bytes / sample_raw))
+    return estimates
+
+
+def compress_to_target(input_path: str, output_path: str, target_bytes: int) -> dict:
+    """
+    Compresses to at most target_bytes with the best settings that are expected to fit:
+    the settings are estimated from a sample of the images, then the full pass runs once,
+    or a second time one rung lower (corrected by how far the estimate was off) if needed.
+    Returns {"bytes", "target_met", "quality", "max_dpi", "passes"}.
+    """
+    estimates = _estimate_ladder(input_path)
+    correction = 1.0
+    tried = set()
+    for passes in range(1, TARGET_MAX_PASSES + 1):
+        rung = next((i for i, estimate in enumerate(estimates) if estimate * correction <= target_bytes),
+                    len(TARGET_LADDER) - 1)
+        if rung in tried:
+            rung = min(max(tried) + 1, len(TARGET_LADDER) - 1)
+        tried.add(rung)
+        quality, max_dpi = TARGET_LADDER[rung]
+        compress_pdf(input_path, output_path, quality=quality, max_dpi=max_dpi)
+
+        achieved = os.path.getsize(output_path)
+        logger.info(f"Target {target_bytes} B pass {passes}: q={quality} dpi={max_dpi} "
+                    f"estimated {estimates[rung]} B, got {achieved} B.")
+        if achieved <= target_bytes or rung == len(TARGET_LADDER) - 1:
+            break
+        correction = achieved / max(1, estimates[rung])
+
+    return {"bytes": achieved, "target_met": achieved <= target_bytes, "quality": quality,
+            "max_dpi": max_dpi, "passes": passes}
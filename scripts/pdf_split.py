@@ -0,0 +1,125 @@
+import os
+
+import fitz  # PyMuPDF
+
+from scripts.render_pool import map_in_pool, RENDER_WORKERS
+from scripts.page_ranges import page_groups, page_runs
+
+
+SPLIT_MODES = ("pages", "ranges", "every", "size")
+SPLIT_PAGE_OVERHEAD = 2048  # rough bytes per page for the page object, tree entries and xref
+
+
+def _split_filename(base_name: str, pages: list[int], index: int) -> str:
+    if len(pages) == 1:
+        return f"{base_name}_page_{pages[0] + 1}.pdf"
+    if pages == list(range(pages[0], pages[-1] + 1)):
+        return f"{base_name}_pages_{pages[0] + 1}-{pages[-1] + 1}.pdf"
+    return f"{base_name}_part_{index + 1}.pdf"
+
+
+def _write_split_batch(input_path: str, output_dir: str, base_name: str, groups: list[tuple[int, list[int]]],
+                       max_bytes: int = None) -> list[str]:
+    """
+    Process pool worker: opens the source once and writes one PDF per (index, pages) group.
+    With max_bytes, a multi-page output that still comes out too large is halved and rewritten.
+    """
+    output_files = []
+    with fitz.open(input_path) as src:
+        pending = list(groups)
+        while pending:
+            index, pages = pending.pop(0)
+            output_filepath = os.path.join(output_dir, _split_filename(base_name, pages, index))
+            with fitz.open() as part:
+                for first, last in page_runs(pages):
+                    part.insert_pdf(src, from_page=first, to_page=last)
+                part.save(output_filepath, garbage=3, deflate=True)
+
+            if max_bytes and len(pages) > 1 and os.path.getsize(output_filepath) > max_bytes:
+                os.remove(output_filepath)
+                half = len(pages) // 2
+                pending[0:0] = [(index, pages[:half]), (index, pages[half:])]
+                continue
+            output_files.append(output_filepath)
+    return output_files
+
+
+def _xref_key_target(doc: fitz.Document, xref: int, key: str) -> int | None:
+    """
+    Returns the xref an indirect dictionary entry points to ("12 0 R" -> 12), if any.
+    """
+    kind, value = doc.xref_get_key(xref, key)
+    return int(value.split()[0]) if kind == "xref" else None
+
+
+def _size_groups(doc: fitz.Document, max_bytes: int) -> list[list[int]]:
+    """
+    Greedily packs consecutive pages into groups whose estimated output size stays under
+    max_bytes. A resource (font, image, content stream) is counted once per group.
+    """
+    sizes = {}
+
+    def xref_size(xref: int) -> int:
+        if xref not in sizes:
+            sizes[xref] = len(doc.xref_object(xref)) + len(doc.xref_stream_raw(xref) or b"")
+        return sizes[xref]
+
+    groups, current, seen, current_size = [], [], set(), 0
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        xrefs = set(page.get_contents())
+        xrefs.update(image[0] for image in page.get_images(full=True))
+        for font in page.get_fonts(full=True):
+            xrefs.add(font[0])
+            descriptor = _xref_key_target(doc, font[0], "FontDescriptor")
+            if descriptor:
+                xrefs.update(filter(None, (_xref_key_target(doc, descriptor, key)
+                                           for key in ("FontFile", "FontFile2", "FontFile3"))))
+
+        cost = SPLIT_PAGE_OVERHEAD + sum(xref_size(x) for x in xrefs - seen)
+        if current and current_size + cost > max_bytes:
+            groups.append(current)
+            current, seen, current_size = [], set(), 0
+            cost = SPLIT_PAGE_OVERHEAD + sum(xref_size(x) for x in xrefs)
+        current.append(page_num)
+        seen |= xrefs
+        current_size += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def split_pdf(input_path: str, output_dir: str, base_name: str, mode: str = "pages",
+              ranges: str = None, every: int = None, max_bytes: int = None) -> list[str]:
+    """
+    Splits a PDF file into several PDF files and returns their paths.
+    Modes:
+    - pages: one file per page
+    - ranges: one file per ';'-separated page spec, e.g. "1-3;4,6;7-10"
+    - every: a file every `every` pages
+    - size: consecutive pages packed into files of at most `max_bytes` (best effort;
+      a single page larger than that still becomes its own file)
+    Batches of output files are written in parallel on the process pool.
+    """
+    with fitz.open(input_path) as doc:
+        if mode == "size":
+            if not max_bytes or max_bytes < 1:
+                raise ValueError("max_bytes must be a positive size.")
+            groups = _size_groups(doc, max_bytes)
+        else:
+            groups = page_groups(len(doc), mode, ranges, every)
+    if not groups:
+        raise ValueError("No pages selected.")
+
+    groups = list(enumerate(groups))
+    input_path = os.path.abspath(input_path)
+    output_dir = os.path.abspath(output_dir)
+    batch_count = max(1, min(RENDER_WORKERS * 3, len(groups)))
+    size = -(-len(groups) // batch_count)
+    jobs = [(input_path, output_dir, base_name, groups[i:i + size], max_bytes if mode == "size" else None)
+            for i in range(0, len(groups), size)]
+
+    output_files = []
+    for batch in map_in_pool(_write_split_batch, jobs):
+        output_files.extend(batch)
+    return output_files
@@ -0,0 +1,145 @@
+import os
+import logging
+import threading
+import multiprocessing
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+MIN_PAGES_PER_CHUNK = 4  # below this the process hop costs more than it saves
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: the app process runs threads, which don't mix with fork
+            _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def open_pdf(input_path: str, password: str = '') -> fitz.Document:
+    """
+    Opens a PDF and unlocks it with the given (default empty) password.
+    """
+    doc = fitz.open(input_path)
+    if doc.needs_pass:
+        doc.authenticate(password)
+        if doc.needs_pass:
+            doc.close()
+            raise RuntimeError("PDF is encrypted and cannot be unlocked with an empty password.")
+    return doc
+
+
+def _encode(pix: fitz.Pixmap, fmt: str, jpg_quality: int) -> bytes:
+    if fmt == "png":
+        return pix.tobytes("png")
+    if fmt == "webp":
+        # PyMuPDF has no WebP writer of its own; this goes through Pillow
+        return pix.pil_tobytes(format="WEBP", quality=jpg_quality)
+    return pix.tobytes("jpeg", jpg_quality=jpg_quality)
+
+
+def _render_chunk(input_path: str, page_numbers: list[int], zoom: float, fmt: str, jpg_quality: int,
+                  output_dir: str | None, base_name: str) -> list:
+    """
+    Worker side: opens the document itself and renders its share of the pages.
+    Returns file paths when output_dir is given, otherwise the encoded image bytes.
+    """
+    results = []
+    ext = fmt if fmt in ("png", "webp") else "jpg"
+    with open_pdf(input_path) as doc:
+        mat = fitz.Matrix(zoom, zoom)
+        for page_num in page_numbers:
+            pix = doc.load_page(page_num).get_pixmap(matrix=mat, alpha=False)
+            data = _encode(pix, fmt, jpg_quality)
+            if output_dir is None:
+                results.append(data)
+                continue
+            output_filepath = os.path.join(output_dir, f"{base_name}_page_{page_num + 1}.{ext}")
+            with open(output_filepath, "wb") as f:
+                f.write(data)
+            results.append(output_filepath)
+    return results
+
+
+def _chunk(page_numbers: list[int], workers: int) -> list[list[int]]:
+    # A few chunks per worker so one slow page range doesn't hold up the rest.
+    chunk_count = max(1, min(workers * 3, len(page_numbers) // MIN_PAGES_PER_CHUNK))
+    size = -(-len(page_numbers) // chunk_count)
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def iter_render_pages(input_path: str, output_dir: str | None = None, base_name: str = "page",
+                      zoom: float = 2.0, fmt: str = "jpg", jpg_quality: int = 90,
+                      page_numbers: list[int] | None = None, workers: int | None = None) -> Iterator:
+    """
+    Rasterizes PDF pages across a process pool, each worker opening the document itself.
+    Yields results in page order as soon as each chunk is done: file paths if output_dir
+    is set, otherwise image bytes.
+    """
+    input_path = os.path.abspath(input_path)
+    if page_numbers is None:
+        with open_pdf(input_path) as doc:
+            page_numbers = list(range(len(doc)))
+    workers = min(workers or RENDER_WORKERS, RENDER_WORKERS)
+
+    chunks = _chunk(page_numbers, workers) if page_numbers else []
+    if workers <= 1 or len(chunks) <= 1:
+        yield from _render_chunk(input_path, page_numbers, zoom, fmt, jpg_quality, output_dir, base_name)
+        return
+
+    executor = _get_executor()
+    futures = [executor.submit(_render_chunk, input_path, chunk, zoom, fmt, jpg_quality, output_dir, base_name)
+               for chunk in chunks]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+    logger.debug(f"Rendered {len(page_numbers)} pages of {input_path} in {len(chunks)} chunks.")
+
+
+def render_pages(input_path: str, output_dir: str | None = None, base_name: str = "page",
+                 zoom: float = 2.0, fmt: str = "jpg", jpg_quality: int = 90,
+                 page_numbers: list[int] | None = None, workers: int | None = None) -> list:
+    """
+    List version of iter_render_pages.
+    """
+    return list(iter_render_pages(input_path, output_dir, base_name, zoom, fmt, jpg_quality, page_numbers, workers))
+
+
+def iter_in_pool(func, jobs: list[tuple]) -> Iterator:
+    """
+    Runs func(*job) for every job on the shared process pool (func must be a module-level
+    function) and yields the results in job order as they become available, so a caller
+    can consume large results one at a time. A single job runs inline.
+    """
+    if RENDER_WORKERS <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield func(*job)
+        return
+    executor = _get_executor()
+    futures = [executor.submit(func, *job) for job in jobs]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def map_in_pool(func, jobs: list[tuple]) -> list:
+    """
+    List version of iter_in_pool.
+    """
+    return list(iter_in_pool(func, jobs))
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_cache_key(input_hashes: list[str], operation: str, params: dict = None) -> str:
+    """
+    Builds a cache key from the content hashes of the inputs, the operation name and
+    the parameters that affect the output (level, degrees, target_format, ...).
+    """
+    payload = json.dumps({"inputs": input_hashes, "op": operation, "params": params or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+FICLONE = 0x40049409  # Linux ioctl: share the source's extents copy-on-write (btrfs, XFS)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _clone_or_copy(src: str, dst: str):
+    """
+    Writes an independent copy of src at dst: a reflink where the filesystem supports it,
+    a plain copy otherwise. Never a hard link, since converters write their outputs in place
+    and that would change the cache entry too. Goes through a temp file, so an existing dst
+    is replaced rather than written through and readers never see a partial file.
+    """
+    tmp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if not _reflink(src, tmp_path):
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ResultCache:
+    """
+    Disk-backed, content-addressed cache of conversion outputs with a total size cap
+    (LRU eviction) and a TTL. The index lives in SQLite so the app process and the job
+    workers share entries and hit/miss counters.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, ttl_seconds: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_path = os.path.join(cache_dir, "index.db")
+        os.makedirs(cache_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _count(self, conn: sqlite3.Connection, name: str):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def _remove(self, conn: sqlite3.Connection, key: str, filename: str):
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        path = os.path.join(self.cache_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get(self, key: str, dest_path: str) -> bool:
+        """
+        On a hit, places the cached output at dest_path and returns True.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT filename, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and now - row["created_at"] > self.ttl_seconds:
+                self._remove(conn, key, row["filename"])
+                row = None
+
+            cached_path = os.path.join(self.cache_dir, row["filename"]) if row else None
+            if cached_path is None or not os.path.exists(cached_path):
+                self._count(conn, "misses")
+                return False
+
+            try:
+                _clone_or_copy(cached_path, dest_path)
+            except OSError as e:
+                # Evicted (or unreadable) between the lookup and the copy
+                logger.warning(f"Cached result {key} could not be copied: {e}")
+                self._count(conn, "misses")
+                return False
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+            return True
+        finally:
+            conn.close()
+
+    def locate(self, key: str, record: bool = True) -> str | None:
+        """
+        Returns the path of the cached entry itself (for serving it in place), or None.
+        With record=False the lookup doesn't count towards the hit/miss statistics.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT filename, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            path = os.path.join(self.cache_dir, row["filename"]) if row else None
+            if path is None or now - row["created_at"] > self.ttl_seconds or not os.path.exists(path):
+                if record:
+                    self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            if record:
+                self._count(conn, "hits")
+            return path
+        finally:
+            conn.close()
+
+    def put(self, key: str, src_path: str):
+        """
+        Stores a copy of src_path under key, then evicts expired and least recently used entries.
+        """
+        filename = key + os.path.splitext(src_path)[1]
+        final_path = os.path.join(self.cache_dir, filename)
+        _clone_or_copy(src_path, final_path)
+        self._index(key, filename, final_path)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str):
+        """
+        Stores data under key as a file ending in suffix (e.g. '.webp').
+        """
+        filename = key + suffix
+        final_path = os.path.join(self.cache_dir, filename)
+        tmp_path = f"{final_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, final_path)
+        self._index(key, filename, final_path)
+
+    def _index(self, key: str, filename: str, final_path: str):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, filename, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, filename, os.path.getsize(final_path), now, now),
+            )
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        expired = conn.execute(
+            "SELECT key, filename FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).fetchall()
+        for row in expired:
+            self._remove(conn, row["key"], row["filename"])
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT key, filename, size FROM entries ORDER BY last_access").fetchall():
+            self._remove(conn, row["key"], row["filename"])
+            self._count(conn, "evictions")
+            total -= row["size"]
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            counters = {row["name"]: row["value"] for row in conn.execute("SELECT name, value FROM counters")}
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        finally:
+            conn.close()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,589 @@
+import os
+import sys
+import atexit
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scripts.converter_image import convert_image_to_pdf, images_to_pdf
+from scripts.converter_daemon import DaemonPool
+from scripts.result_cache import ResultCache, make_cache_key
+from scripts.thumbnails import document_page_count, page_thumbnails, sprite_sheet
+from scripts.pdf_tools import (
+    merge_pdfs, split_pdf, compress_pdf, compress_pdf_to_target, rotate_pdf, watermark_pdf,
+    pdf_to_images, encrypt_pdf, decrypt_pdf
+)
+
+logger = logging.getLogger(__name__)
+
+# Every conversion is expressed as an operation name plus a JSON-serializable params dict,
+# so the same code path runs inline in a request handler or later in a job worker.
+# Multi-file results are returned as 'members' of a ZIP that is streamed at download time
+# (see scripts/zip_stream.py) instead of being written to disk a second time.
+
+
+def _venv_python(venv_name: str, fallback_to_current: bool = False) -> str:
+    venv_python = os.path.join(os.getcwd(), venv_name, "Scripts", "python.exe")
+    if not os.path.exists(venv_python):
+        if fallback_to_current:
+            return sys.executable
+        raise FileNotFoundError(f"{venv_name} Python executable not found")
+    return venv_python
+
+
+# Converter modules that run in their own venv, served by warm daemon processes.
+# venv name -> (modules, fall back to the current interpreter if the venv is missing)
+CONVERTER_VENVS = {
+    "venv_words": (["scripts.converter_docx"], False),
+    "venv_slides": (["scripts.converter_pptx"], False),
+    "venv_excel": (["scripts.converter_pdf2excel"], False),
+    "venv": (["scripts.converter_pdf2docx"], True),
+}
+DAEMONS_PER_VENV = int(os.environ.get("CONVERTER_DAEMONS_PER_VENV", 2))
+DAEMON_MAX_JOBS = int(os.environ.get("CONVERTER_DAEMON_MAX_JOBS", 200))
+DAEMON_CALL_TIMEOUT = int(os.environ.get("CONVERTER_TIMEOUT", 900))
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg"]
+COMBINED_IMAGES_NAME = "images_combined.pdf"
+# Hard wall-clock limit for one PDF -> DOCX conversion, enforced inside the converter so its
+# page workers are stopped too; the daemon call gets a little longer as a backstop.
+PDF_TO_DOCX_TIMEOUT = int(os.environ.get("PDF_TO_DOCX_TIMEOUT", 600))
+# Files of one convert task are converted concurrently, up to CONVERT_FILE_CONCURRENCY at a
+# time, and at most CONVERT_MAX_CONCURRENT across all tasks of this process (the converter
+# daemons are the real limit; more would only queue in front of them).
+CONVERT_FILE_CONCURRENCY = int(os.environ.get("CONVERT_FILE_CONCURRENCY", 4))
+CONVERT_MAX_CONCURRENT = int(os.environ.get("CONVERT_MAX_CONCURRENT", DAEMONS_PER_VENV * len(CONVERTER_VENVS)))
+_convert_slots = threading.BoundedSemaphore(CONVERT_MAX_CONCURRENT)
+# Request-path operations run in warm task daemons on the current interpreter (see run_task_in_worker),
+# so CPU-bound PDF work never blocks the web server and a stuck one is killed after TASK_TIMEOUT.
+# The daemons share one core budget: each sizes its render/split/compress pools to
+# cpu_count // TASK_WORKERS (see pool_size_overrides), so a few daemons keep those pools parallel.
+TASK_WORKERS = int(os.environ.get("TASK_WORKERS", max(2, (os.cpu_count() or 1) // 4)))
+TASK_TIMEOUT = int(os.environ.get("TASK_TIMEOUT", 300))
+TASK_POOL = "tasks"
+# Operations that mostly wait on the converter daemons; they run on a thread of the caller and
+# only their in-process CPU work (images -> PDF) is sent to a task daemon (see _offloaded).
+DELEGATING_OPERATIONS = {"convert", "pdf_to_excel"}
+_offload_cpu_work = contextvars.ContextVar("offload_cpu_work", default=False)
+
+_daemon_pools = {}
+_daemon_pools_lock = threading.Lock()
+
+
+def get_daemon_pool(venv_name: str) -> DaemonPool:
+    with _daemon_pools_lock:
+        pool = _daemon_pools.get(venv_name)
+        if pool is None:
+            modules, fallback = CONVERTER_VENVS[venv_name]
+            pool = DaemonPool(venv_name, _venv_python(venv_name, fallback), modules,
+                              size=DAEMONS_PER_VENV, max_jobs=DAEMON_MAX_JOBS)
+            _daemon_pools[venv_name] = pool
+        return pool
+
+
+def get_task_pool() -> DaemonPool:
+    # Kept with the converter pools so health checks and shutdown cover it too
+    with _daemon_pools_lock:
+        pool = _daemon_pools.get(TASK_POOL)
+        if pool is None:
+            pool = DaemonPool(TASK_POOL, sys.executable, ["scripts.tasks"], size=TASK_WORKERS, max_jobs=DAEMON_MAX_JOBS)
+            _daemon_pools[TASK_POOL] = pool
+        return pool
+
+
+def converter_health() -> dict:
+    with _daemon_pools_lock:
+        pools = dict(_daemon_pools)
+    return {name: pool.health_check() for name, pool in pools.items()}
+
+
+@atexit.register
+def shutdown_daemon_pools():
+    with _daemon_pools_lock:
+        pools = list(_daemon_pools.values())
+        _daemon_pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+# Content-addressed cache of conversion outputs, shared by the app and the job workers.
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(os.getcwd(), "cache", "results"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))  # 2 GB
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+
+# Operations whose single output depends only on the input contents and these params.
+# protect/unlock are left out on purpose so no password-derived output is kept around.
+CACHEABLE_OPERATIONS = {
+    "merge": ("page_ranges",),
+    "compress": ("level", "target_bytes"),
+    "rotate": ("degrees",),
+    "watermark": ("text",),
+    "pdf_to_excel": ("format",),
+}
+
+_result_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL)
+    return _result_cache
+
+
+# Progress of the running task, merged from every report (e.g. files done by task_convert,
+# pages done by a converter) and passed to the on_progress callback given to run_task.
+_progress_callback = contextvars.ContextVar("progress_callback", default=None)
+_progress_state = contextvars.ContextVar("progress_state", default=None)
+_progress_lock = threading.Lock()  # convert tasks report from several threads
+
+
+def report_progress(progress: dict):
+    callback, state = _progress_callback.get(), _progress_state.get()
+    if callback is None:
+        return
+    with _progress_lock:
+        state.update(progress)
+        try:
+            callback(dict(state))
+        except Exception as e:
+            logger.warning(f"Progress report failed: {e}")
+
+
+def _run_in_venv(venv_name: str, module: str, func: str, input_path: str, output_path: str, error_prefix: str,
+                 extra_args: tuple = (), timeout: float = DAEMON_CALL_TIMEOUT):
+    try:
+        get_daemon_pool(venv_name).call(module, func, input_path, output_path, *extra_args,
+                                        timeout=timeout, on_progress=report_progress)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"{error_prefix}: {e}")
+
+
+def convert_file(input_path: str, out_dir: str, base_name: str, ext: str, t_fmt: str, options: dict = None) -> str:
+    """
+    Converts a single uploaded file to t_fmt and returns the output path.
+    options: slide_format/slide_dpi for PDF -> PPTX, image_max_side for images -> PDF
+    (converter defaults when missing).
+    Raises ValueError for unsupported source/target combinations.
+    """
+    options = options or {}
+    if ext == ".docx":
+        if t_fmt != "pdf":
+            raise ValueError("Word dosyaları sadece PDF formatına dönüştürülebilir.")
+        output_path = os.path.join(out_dir, f"{base_name}.pdf")
+        _run_in_venv("venv_words", "scripts.converter_docx", "convert_docx_to_pdf",
+                     input_path, output_path, "DOCX Dönüşüm Hatası")
+
+    elif ext == ".pptx":
+        if t_fmt != "pdf":
+            raise ValueError("PowerPoint sadece PDF'e dönüştürülebilir.")
+        output_path = os.path.join(out_dir, f"{base_name}.pdf")
+        _run_in_venv("venv_slides", "scripts.converter_pptx", "convert_pptx_to_pdf",
+                     input_path, output_path, "PPTX Dönüşüm Hatası")
+
+    elif ext == ".pdf":
+        if t_fmt == "pptx":
+            output_path = os.path.join(out_dir, f"{base_name}.pptx")
+            _run_in_venv("venv_slides", "scripts.converter_pptx", "convert_pdf_to_pptx",
+                         input_path, output_path, "PDF->PPTX Hatası",
+                         (options.get("slide_format"), options.get("slide_dpi")))
+        elif t_fmt == "docx":
+            output_path = os.path.join(out_dir, f"{base_name}.docx")
+            _run_in_venv("venv", "scripts.converter_pdf2docx", "convert_pdf_to_docx",
+                         input_path, output_path, "PDF->DOCX Hatası",
+                         (PDF_TO_DOCX_TIMEOUT,), timeout=PDF_TO_DOCX_TIMEOUT + 60)
+        else:
+            raise ValueError(f"PDF'den '{t_fmt}' formatına dönüştürme desteklenmiyor.")
+
+    elif ext in IMAGE_EXTENSIONS:
+        output_path = os.path.join(out_dir, f"{base_name}.pdf")
+        convert_image_to_pdf(input_path, output_path, options.get("image_max_side"))
+
+    else:
+        raise ValueError(f"'{ext}' dosyaları dönüştürülemiyor.")
+
+    return output_path
+
+
+def _converted_path(item: dict, out_dir: str, t_fmt: str) -> str:
+    target_ext = f".{t_fmt}" if item["ext"] == ".pdf" else ".pdf"
+    return os.path.join(out_dir, f"{item['base_name']}{target_ext}")
+
+
+def _convert_cache_key(item: dict, t_fmt: str, options: dict = None) -> str:
+    key_params = {"ext": item["ext"], "target_format": t_fmt}
+    if options:
+        key_params["options"] = options
+    return make_cache_key([item["sha256"]], "convert", key_params)
+
+
+def _with_unique_outputs(inputs: list[dict], out_dir: str, t_fmts: list[str], reserved: set[str]) -> list[dict]:
+    """
+    Copies of inputs whose output paths don't collide: uploads with the same name (a.docx and
+    a.pptx, or the same file twice) would otherwise convert onto one file, so later ones get
+    their upload index appended to the name. reserved holds paths already taken.
+    """
+    used = {path.lower() for path in reserved}
+    items = []
+    for index, item in enumerate(inputs):
+        if t_fmts[index]:
+            suffix = 1
+            while _converted_path(item, out_dir, t_fmts[index]).lower() in used:
+                number = item.get("index", index) if suffix == 1 else f"{item.get('index', index)}_{suffix}"
+                item = dict(inputs[index], base_name=f"{inputs[index]['base_name']}_{number}")
+                suffix += 1
+            used.add(_converted_path(item, out_dir, t_fmts[index]).lower())
+        items.append(item)
+    return items
+
+
+def convert_file_cached(item: dict, out_dir: str, t_fmt: str, options: dict = None) -> str:
+    """
+    convert_file with a lookup in the result cache keyed by the input's content hash.
+    """
+    if not item.get("sha256"):
+        return convert_file(item["path"], out_dir, item["base_name"], item["ext"], t_fmt, options)
+
+    output_path = _converted_path(item, out_dir, t_fmt)
+    cache = get_result_cache()
+    key = _convert_cache_key(item, t_fmt, options)
+    if cache.get(key, output_path):
+        return output_path
+
+    output_path = convert_file(item["path"], out_dir, item["base_name"], item["ext"], t_fmt, options)
+    if os.path.exists(output_path):
+        cache.put(key, output_path)
+    return output_path
+
+
+def convert_docx_batch_cached(items: list[dict], out_dir: str) -> tuple[dict[int, str], dict[int, str]]:
+    """
+    DOCX -> PDF for several uploads in one venv_words daemon call, so pandoc runs for all
+    of them at once and WeasyPrint stays warm. Cached results are reused.
+    Returns ({index in items: output path}, {index in items: error}).
+    """
+    cache = get_result_cache()
+    outputs, errors, pending = {}, {}, []
+    for index, item in enumerate(items):
+        output_path = _converted_path(item, out_dir, "pdf")
+        key = _convert_cache_key(item, "pdf") if item.get("sha256") else None
+        if key and cache.get(key, output_path):
+            outputs[index] = output_path
+        else:
+            pending.append((index, output_path, key))
+    if not pending:
+        return outputs, errors
+
+    try:
+        results = get_daemon_pool("venv_words").call(
+            "scripts.converter_docx", "convert_docx_batch_to_pdf",
+            [[items[index]["path"], output_path] for index, output_path, _ in pending],
+            timeout=DAEMON_CALL_TIMEOUT, on_progress=report_progress)
+    except Exception as e:
+        results = [{"error": str(e)}] * len(pending)
+
+    for (index, output_path, key), result in zip(pending, results):
+        if result["error"] or not os.path.exists(output_path):
+            errors[index] = f"DOCX Dönüşüm Hatası: {result['error']}"
+            continue
+        outputs[index] = output_path
+        if key:
+            cache.put(key, output_path)
+    return outputs, errors
+
+
+def images_to_pdf_cached(items: list[dict], out_dir: str, options: dict = None) -> str:
+    """
+    All images in one PDF (images_combined.pdf), cached by the inputs' content hashes in order.
+    """
+    max_side = (options or {}).get("image_max_side")
+    output_path = os.path.join(out_dir, COMBINED_IMAGES_NAME)
+    hashes = [item.get("sha256") for item in items]
+    if not all(hashes):
+        images_to_pdf([item["path"] for item in items], output_path, max_side)
+        return output_path
+
+    cache = get_result_cache()
+    key = make_cache_key(hashes, "images_to_pdf", {"image_max_side": max_side})
+    if cache.get(key, output_path):
+        return output_path
+    images_to_pdf([item["path"] for item in items], output_path, max_side)
+    cache.put(key, output_path)
+    return output_path
+
+
+def default_target_format(ext: str) -> str | None:
+    if ext in [".docx", ".pptx", *IMAGE_EXTENSIONS]:
+        return "pdf"
+    if ext == ".pdf":
+        return "pptx"
+    return None
+
+
+def _convert_unit(indexes: list[int], convert) -> tuple[dict[int, str], dict[int, str], bool]:
+    """
+    Runs one unit of a convert task (a file, or a batch of them) under the global cap and
+    turns a failure into an error for each of its files. The flag is True when the failure
+    was a ValueError, i.e. the input or the requested format was at fault.
+    """
+    with _convert_slots:
+        try:
+            return (*convert(), False)
+        except ValueError as e:
+            return {}, {index: str(e) for index in indexes}, True
+        except Exception as e:
+            logger.error(f"Conversion failed: {e}")
+            return {}, {index: str(e) for index in indexes}, False
+
+
+def task_convert(params: dict) -> dict:
+    """
+    params: inputs (list of {path, ext, base_name, sha256, index}), out_dir, target_format, zip_path,
+    options (optional, see convert_file), combine_images (one PDF for all images),
+    rejected (optional, [{index, file, error}] for uploads that never made it to inputs)
+    Files are converted concurrently; a failed file is listed in 'errors' and only fails
+    the task when nothing could be converted. That failure is a ValueError when every file
+    was rejected or unsupported, and a RuntimeError when a converter broke.
+    """
+    inputs = params["inputs"]
+    out_dir, options = params["out_dir"], params.get("options")
+    t_fmts = [(params.get("target_format") or default_target_format(item["ext"]) or "").lower() for item in inputs]
+    combined_path = os.path.join(out_dir, COMBINED_IMAGES_NAME)
+    items = _with_unique_outputs(inputs, out_dir, t_fmts, {combined_path} if params.get("combine_images") else set())
+    units = []
+
+    # All DOCX -> PDF files of the request go through one batch instead of a call each
+    docx = [i for i, item in enumerate(inputs) if item["ext"] == ".docx" and t_fmts[i] == "pdf"]
+    if len(docx) > 1:
+        def convert_docx(docx=docx):
+            outputs, errors = convert_docx_batch_cached([items[i] for i in docx], out_dir)
+            return {docx[j]: path for j, path in outputs.items()}, {docx[j]: error for j, error in errors.items()}
+        units.append((docx, convert_docx))
+
+    # Images can be assembled into one multi-page PDF, listed where the first image was
+    images = [i for i, item in enumerate(inputs) if item["ext"] in IMAGE_EXTENSIONS and t_fmts[i] == "pdf"]
+    if not (params.get("combine_images") and len(images) > 1):
+        images = []
+    if images:
+        units.append((images, lambda: ({images[0]: _offloaded(images_to_pdf_cached, [items[i] for i in images],
+                                                               out_dir, options)}, {})))
+
+    batched = set(docx if len(docx) > 1 else []) | set(images)
+    for index, item in enumerate(items):
+        if t_fmts[index] and index not in batched:
+            # Images are converted in-process; everything else waits on a converter daemon
+            convert = _offloaded if item["ext"] in IMAGE_EXTENSIONS else lambda func, *args: func(*args)
+            units.append(([index], lambda index=index, item=item, convert=convert: (
+                {index: convert(convert_file_cached, item, out_dir, t_fmts[index], options)}, {})))
+
+    outputs, errors = {}, {}
+    user_errors = set()
+    files_done = 0
+    report_progress({"files_done": 0, "files": len(inputs)})
+    if units:
+        with ThreadPoolExecutor(max_workers=min(CONVERT_FILE_CONCURRENCY, len(units))) as pool:
+            # Workers report progress (e.g. DOCX pages) too, so they run in this task's context
+            futures = {pool.submit(contextvars.copy_context().run, _convert_unit, indexes, convert): indexes
+                       for indexes, convert in units}
+            for future in as_completed(futures):
+                unit_outputs, unit_errors, user_error = future.result()
+                outputs.update(unit_outputs)
+                errors.update(unit_errors)
+                if user_error:
+                    user_errors.update(unit_errors)
+                files_done += len(futures[future])
+                report_progress({"files_done": files_done, "files": len(inputs)})
+
+    # Results keep the upload order
+    processed_files = [outputs[index] for index in sorted(outputs) if os.path.exists(outputs[index])]
+    failures = list(params.get("rejected") or [])
+    failures += [{"index": inputs[i].get("index", i), "file": f"{inputs[i]['base_name']}{inputs[i]['ext']}",
+                  "error": errors[i]} for i in sorted(errors)]
+    failures.sort(key=lambda failure: failure["index"])
+
+    if not processed_files:
+        if failures:
+            message = "; ".join(f"{failure['file']}: {failure['error']}" for failure in failures)
+            raise ValueError(message) if user_errors >= errors.keys() else RuntimeError(message)
+        raise ValueError("Dönüştürülecek dosya bulunamadı veya işlem başarısız.")
+
+    if len(processed_files) == 1:
+        result = {"output_path": processed_files[0], "count": 1}
+    else:
+        result = {"output_path": params["zip_path"], "members": processed_files, "count": len(processed_files)}
+    if failures:
+        result["errors"] = failures
+    return result
+
+
+def task_merge(params: dict) -> dict:
+    merge_pdfs(params["input_paths"], params["output_path"], params.get("page_ranges"))
+    return {"output_path": params["output_path"]}
+
+
+def task_split(params: dict) -> dict:
+    split_files = split_pdf(params["input_path"], params["temp_dir"], params["base_name"],
+                            mode=params.get("mode", "pages"), ranges=params.get("ranges"),
+                            every=params.get("every"), max_bytes=params.get("max_bytes"))
+    return {"output_path": params["zip_path"], "members": split_files}
+
+
+def task_compress(params: dict) -> dict:
+    if params.get("target_bytes"):
+        report = compress_pdf_to_target(params["input_path"], params["output_path"], params["target_bytes"])
+        return {"output_path": params["output_path"], **report}
+    compress_pdf(params["input_path"], params["output_path"], level=params.get("level", "medium"))
+    return {"output_path": params["output_path"]}
+
+
+def task_rotate(params: dict) -> dict:
+    rotate_pdf(params["input_path"], params["output_path"], degrees=params.get("degrees", 90))
+    return {"output_path": params["output_path"]}
+
+
+def task_watermark(params: dict) -> dict:
+    watermark_pdf(params["input_path"], params["output_path"], watermark_text=params["text"])
+    return {"output_path": params["output_path"]}
+
+
+def task_pdf_to_image(params: dict) -> dict:
+    image_files = pdf_to_images(params["input_path"], params["temp_dir"], params["base_name"])
+    return {"output_path": params["zip_path"], "members": image_files}
+
+
+def task_pdf_to_jpg(params: dict) -> dict:
+    from scripts.converter_pdf2jpg import convert_pdf_to_jpg
+    image_files = convert_pdf_to_jpg(params["input_path"], params["temp_dir"], params["base_name"])
+    return {"output_path": params["zip_path"], "members": image_files}
+
+
+def task_pdf_to_excel(params: dict) -> dict:
+    _run_in_venv("venv_excel", "scripts.converter_pdf2excel", "convert_pdf_to_excel",
+                 params["input_path"], params["output_path"], "PDF'den Excel'e dönüştürme hatası",
+                 (params.get("format") or "xlsx",))
+    return {"output_path": params["output_path"]}
+
+
+def task_protect(params: dict) -> dict:
+    encrypt_pdf(params["input_path"], params["output_path"], params["password"])
+    return {"output_path": params["output_path"]}
+
+
+def task_unlock(params: dict) -> dict:
+    decrypt_pdf(params["input_path"], params["output_path"], params["password"])
+    return {"output_path": params["output_path"]}
+
+
+TASKS = {
+    "convert": task_convert,
+    "merge": task_merge,
+    "split": task_split,
+    "compress": task_compress,
+    "rotate": task_rotate,
+    "watermark": task_watermark,
+    "pdf_to_image": task_pdf_to_image,
+    "pdf_to_jpg": task_pdf_to_jpg,
+    "pdf_to_excel": task_pdf_to_excel,
+    "protect": task_protect,
+    "unlock": task_unlock,
+}
+
+
+def run_task(operation: str, params: dict, on_progress=None) -> dict:
+    """
+    Runs a registered operation and returns its result dict (always contains 'output_path',
+    plus 'members' when the result is a ZIP of several files).
+    on_progress(dict) receives partial progress from operations that report it.
+    """
+    task = TASKS.get(operation)
+    if task is None:
+        raise ValueError(f"Unknown operation: {operation}")
+
+    callback_token = _progress_callback.set(on_progress)
+    state_token = _progress_state.set({})
+    try:
+        return _run_task(operation, task, params)
+    finally:
+        _progress_callback.reset(callback_token)
+        _progress_state.reset(state_token)
+
+
+def _run_task(operation: str, task, params: dict) -> dict:
+    """
+    Runs the task, serving cacheable operations from the result cache when possible.
+    """
+    if operation not in CACHEABLE_OPERATIONS or not params.get("input_hashes"):
+        return task(params)
+
+    cache = get_result_cache()
+    key = make_cache_key(params["input_hashes"], operation,
+                         {name: params.get(name) for name in CACHEABLE_OPERATIONS[operation]})
+    if cache.get(key, params["output_path"]):
+        return {"output_path": params["output_path"], "cached": True}
+
+    result = task(params)
+    if os.path.exists(result["output_path"]):
+        cache.put(key, result["output_path"])
+    return result
+
+
+def _in_task_daemon(func_name: str, *args):
+    try:
+        return get_task_pool().call("scripts.tasks", func_name, *args, timeout=TASK_TIMEOUT)
+    except TimeoutError:
+        raise TimeoutError(f"{func_name} did not finish within {TASK_TIMEOUT} seconds.")
+
+
+def _offloaded(func, *args):
+    """
+    Runs CPU-bound in-process work of a delegating operation: in a task daemon when the
+    operation runs in the web process (see run_task_in_worker), right here otherwise
+    (e.g. in a job worker). func must be a public function of this module.
+    """
+    if _offload_cpu_work.get():
+        return _in_task_daemon(func.__name__, *args)
+    return func(*args)
+
+
+def run_task_in_worker(operation: str, params: dict, on_progress=None) -> dict:
+    """
+    Blocking: runs an operation off the calling process and returns its result dict.
+    Operations in DELEGATING_OPERATIONS run here (their converters are daemons already) and
+    send their own CPU work to the task daemons; the rest go to a task daemon entirely.
+    A task daemon is killed and replaced if it exceeds TASK_TIMEOUT.
+    on_progress is passed to run_task for the delegating operations, the ones that report progress.
+    """
+    if operation in DELEGATING_OPERATIONS:
+        token = _offload_cpu_work.set(True)
+        try:
+            return run_task(operation, params, on_progress=on_progress)
+        finally:
+            _offload_cpu_work.reset(token)
+    try:
+        return _in_task_daemon("run_task", operation, params)
+    except TimeoutError:
+        raise TimeoutError(f"{operation} did not finish within {TASK_TIMEOUT} seconds.")
+
+
+def first_page_preview(input_path: str, doc_hash: str, fmt: str, zoom: float) -> dict:
+    """
+    First-page thumbnail key (rendered or from the cache) and page count of one document
+    of a batch preview, or {"error": "locked" | "failed"}.
+    """
+    page_count = document_page_count(input_path)
+    if page_count is None:
+        return {"error": "locked"}
+    if page_count == 0:
+        return {"error": "failed"}
+    thumbs = page_thumbnails(input_path, doc_hash, [0], zoom, fmt)
+    return {"key": thumbs[0]["key"], "page_count": page_count}
+
+
+def run_in_task_daemon(func_name: str, *args):
+    """
+    Blocking: runs a public function of this module that isn't an operation (the preview
+    helpers) in a task daemon, which is killed and replaced if it exceeds TASK_TIMEOUT.
+    """
+    return _in_task_daemon(func_name, *args)
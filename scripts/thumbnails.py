@@ -0,0 +1,129 @@
+import os
+import io
+import json
+import logging
+import threading
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from scripts.render_pool import iter_render_pages
+from scripts.result_cache import ResultCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CACHE_DIR = os.environ.get("THUMBNAIL_CACHE_DIR", os.path.join(os.getcwd(), "cache", "thumbnails"))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("THUMBNAIL_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512 MB
+THUMBNAIL_CACHE_TTL = int(os.environ.get("THUMBNAIL_CACHE_TTL", 30 * 24 * 3600))
+
+THUMBNAIL_FORMATS = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+_PIL_FORMATS = {"webp": "WEBP", "jpg": "JPEG", "png": "PNG"}
+THUMBNAIL_ZOOM = 0.5
+MAX_THUMBNAIL_ZOOM = 1.0
+THUMBNAIL_QUALITY = 75
+SPRITE_COLUMNS = 10
+MAX_SPRITE_PIXELS = 40_000_000  # ~120 MB of RGB while composing
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ResultCache:
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ResultCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES, THUMBNAIL_CACHE_TTL)
+        return _thumbnail_cache
+
+
+def thumbnail_path(key: str) -> str | None:
+    """
+    Path of a cached thumbnail or sprite sheet, for serving it directly.
+    """
+    return get_thumbnail_cache().locate(key, record=False)
+
+
+def page_thumbnails(input_path: str, doc_hash: str, page_numbers: list[int],
+                    zoom: float = THUMBNAIL_ZOOM, fmt: str = "webp") -> list[dict]:
+    """
+    Returns [{"page": n, "key": cache key}] for the given 0-based pages. Only pages that
+    aren't cached yet are rendered, in one pass over the render pool.
+    """
+    cache = get_thumbnail_cache()
+    keys = {p: make_cache_key([doc_hash], "thumbnail", {"page": p, "zoom": zoom, "fmt": fmt}) for p in page_numbers}
+    missing = [p for p in page_numbers if cache.locate(keys[p]) is None]
+
+    if missing:
+        rendered = iter_render_pages(input_path, None, zoom=zoom, fmt=fmt, jpg_quality=THUMBNAIL_QUALITY,
+                                     page_numbers=missing)
+        for page_num, data in zip(missing, rendered):
+            cache.put_bytes(keys[page_num], data, f".{fmt}")
+        logger.info(f"Rendered {len(missing)} of {len(page_numbers)} thumbnails for {doc_hash[:12]}.")
+
+    return [{"page": p + 1, "key": keys[p]} for p in page_numbers]
+
+
+def sprite_sheet(input_path: str, doc_hash: str, page_numbers: list[int], zoom: float = THUMBNAIL_ZOOM,
+                 fmt: str = "webp", columns: int = SPRITE_COLUMNS) -> dict:
+    """
+    Packs the page thumbnails into one image laid out on a fixed grid and returns its
+    layout: {"key", "tile_width", "tile_height", "columns", "tiles": [{"page", "x", "y", "width", "height"}]}.
+    The sheet is built from the per-page cache entries and cached itself.
+    """
+    if not page_numbers:
+        raise ValueError("A sprite sheet needs at least one page.")
+    cache = get_thumbnail_cache()
+    key = make_cache_key([doc_hash], "thumbnail_sprite",
+                         {"pages": page_numbers, "zoom": zoom, "fmt": fmt, "columns": columns})
+    layout_key = make_cache_key([doc_hash], "thumbnail_sprite_layout",
+                                {"pages": page_numbers, "zoom": zoom, "fmt": fmt, "columns": columns})
+
+    layout_path = cache.locate(layout_key)
+    if layout_path is not None and cache.locate(key, record=False) is not None:
+        with open(layout_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    # Reject an oversized sheet from the page geometry before anything is rendered
+    matrix = fitz.Matrix(zoom, zoom)
+    with fitz.open(input_path) as doc:
+        tile_rects = [(doc[p].rect * matrix).irect for p in page_numbers]
+    columns = max(1, min(columns, len(page_numbers)))
+    rows = -(-len(page_numbers) // columns)
+    tile_width = max(rect.width for rect in tile_rects)
+    tile_height = max(rect.height for rect in tile_rects)
+    if columns * tile_width * rows * tile_height > MAX_SPRITE_PIXELS:
+        raise ValueError("Sprite sheet would be too large; request a page range or a smaller zoom.")
+
+    thumbs = page_thumbnails(input_path, doc_hash, page_numbers, zoom, fmt)
+    # Pillow rather than fitz.Pixmap for composing: MuPDF can't decode the cached WebP tiles
+    images = [Image.open(cache.locate(thumb["key"], record=False)) for thumb in thumbs]
+    try:
+        tile_width = max(image.width for image in images)
+        tile_height = max(image.height for image in images)
+        sheet = Image.new("RGB", (columns * tile_width, rows * tile_height), "white")
+        tiles = []
+        for i, (thumb, image) in enumerate(zip(thumbs, images)):
+            x, y = (i % columns) * tile_width, (i // columns) * tile_height
+            sheet.paste(image, (x, y))
+            tiles.append({"page": thumb["page"], "x": x, "y": y, "width": image.width, "height": image.height})
+    finally:
+        for image in images:
+            image.close()
+
+    buffer = io.BytesIO()
+    sheet.save(buffer, format=_PIL_FORMATS[fmt], quality=THUMBNAIL_QUALITY)
+    cache.put_bytes(key, buffer.getvalue(), f".{fmt}")
+
+    layout = {"key": key, "tile_width": tile_width, "tile_height": tile_height, "columns": columns, "tiles": tiles}
+    cache.put_bytes(layout_key, json.dumps(layout).encode("utf-8"), ".json")
+    return layout
+
+
+def document_page_count(input_path: str) -> int | None:
+    """
+    Returns the page count, or None if the document is password protected.
+    """
+    with fitz.open(input_path) as doc:
+        if doc.needs_pass and not doc.authenticate(""):
+            return None
+        return len(doc)
@@ -0,0 +1,65 @@
+import os
+import io
+import zipfile
+from typing import Iterable, Iterator
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Formats that are already compressed; deflating them again only burns CPU.
+STORED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".webp", ".gif",
+    ".pdf", ".docx", ".pptx", ".xlsx", ".zip", ".gz", ".parquet",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, non-seekable buffer that zipfile writes into and we drain after each
+    write, so the archive can be sent while it's being built.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> list[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def compression_for(name: str) -> int:
+    return zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def iter_zip(entries: Iterable[tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Yields a ZIP archive of (arcname, file_path) entries chunk by chunk. `entries` may be
+    a generator; each entry is written as soon as it is produced. Already-compressed
+    formats are stored, everything else is deflated.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for arcname, path in entries:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = compression_for(arcname)
+            with open(path, "rb") as src, zf.open(zinfo, "w") as dst:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+def zip_entries(file_paths: Iterable[str]) -> Iterator[tuple[str, str]]:
+    for path in file_paths:
+        yield os.path.basename(path), path
@@ -469,6 +469,24 @@ startPasswordBtn.addEventListener('click', () => {
     }
 });
 
+function renderThumbnail(thumbDiv, fileName, data) {
+    if (data.thumbnail) {
+        thumbDiv.innerHTML = `
+            <img src="${data.thumbnail}" alt="Preview">
+            <span>${fileName}</span>
+        `;
+    } else {
+        const t = translationsLoaded ? translations[currentLang] : translations['tr'];
+        const kilitliText = t.kilitli_hata || 'Kilitli/Hata';
+        thumbDiv.innerHTML = `
+            <div style="width:100px; height:140px; background:#30363d; border-radius:4px; margin-bottom:8px; display:flex; align-items:center; justify-content:center;">
+                <span style="color:#8b949e; font-size:0.8rem; text-align:center;">${kilitliText}</span>
+            </div>
+            <span>${fileName}</span>
+        `;
+    }
+}
+
 async function generateThumbnails(files) {
     const previewPanel = document.getElementById('preview-panel');
     const thumbnailsContainer = document.getElementById('preview-thumbnails');
@@ -476,60 +494,62 @@ async function generateThumbnails(files) {
     // Clear old thumbnails but keep container visible if files exist
     thumbnailsContainer.innerHTML = '';
 
-    let hasPdf = false;
-    for (const file of files) {
-        if (file.name.toLowerCase().endsWith('.pdf')) {
-            hasPdf = true;
-
-            // Create placeholder
-            const thumbDiv = document.createElement('div');
-            thumbDiv.className = 'thumbnail-item';
-            thumbDiv.innerHTML = `
-                <div class="loader-container">
-                    <div class="spinner"></div>
-                </div>
-                <span>${file.name}</span>
-            `;
-            thumbnailsContainer.appendChild(thumbDiv);
-
-            // Fetch preview
-            const formData = new FormData();
-            formData.append('file', file);
-
-            try {
-                const response = await fetch('/preview/', {
-                    method: 'POST',
-                    body: formData
-                });
-
-                if (response.ok) {
-                    const data = await response.json();
-                    if (data.thumbnail) {
-                        thumbDiv.innerHTML = `
-                            <img src="${data.thumbnail}" alt="Preview">
-                            <span>${file.name}</span>
-                        `;
-                    } else {
-                        const t = translationsLoaded ? translations[currentLang] : translations['tr'];
-                        const kilitliText = t.kilitli_hata || 'Kilitli/Hata';
-                        thumbDiv.innerHTML = `
-                            <div style="width:100px; height:140px; background:#30363d; border-radius:4px; margin-bottom:8px; display:flex; align-items:center; justify-content:center;">
-                                <span style="color:#8b949e; font-size:0.8rem; text-align:center;">${kilitliText}</span>
-                            </div>
-                            <span>${file.name}</span>
-                        `;
-                    }
-                }
-            } catch (e) {
-                console.error("Preview fetch err", e);
-            }
-        }
+    const pdfFiles = files.filter(file => file.name.toLowerCase().endsWith('.pdf'));
+    if (pdfFiles.length === 0) {
+        previewPanel.classList.add('hidden');
+        return;
     }
 
-    if (hasPdf) {
-        previewPanel.classList.remove('hidden');
-    } else {
-        previewPanel.classList.add('hidden');
+    // Create placeholders up front; they are filled in as the server finishes each file
+    const thumbDivs = pdfFiles.map(file => {
+        const thumbDiv = document.createElement('div');
+        thumbDiv.className = 'thumbnail-item';
+        thumbDiv.innerHTML = `
+            <div class="loader-container">
+                <div class="spinner"></div>
+            </div>
+            <span>${file.name}</span>
+        `;
+        thumbnailsContainer.appendChild(thumbDiv);
+        return thumbDiv;
+    });
+    previewPanel.classList.remove('hidden');
+
+    // One request for the whole selection; the response is NDJSON, one line per finished file
+    const formData = new FormData();
+    pdfFiles.forEach(file => formData.append('files', file));
+    const resolved = new Set();
+
+    try {
+        const response = await fetch('/preview/batch/', {
+            method: 'POST',
+            body: formData
+        });
+        if (!response.ok || !response.body) return;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const data = JSON.parse(line);
+                renderThumbnail(thumbDivs[data.index], pdfFiles[data.index].name, data);
+                resolved.add(data.index);
+            }
+        }
+    } catch (e) {
+        console.error("Preview fetch err", e);
+    } finally {
+        // A rejected request (e.g. too many files) or a cut-off stream leaves placeholders unanswered
+        thumbDivs.forEach((thumbDiv, index) => {
+            if (!resolved.has(index)) renderThumbnail(thumbDiv, pdfFiles[index].name, { error: 'failed' });
+        });
     }
 }
 
@@ -634,6 +654,8 @@ async function uploadAndConvert(files) {
     progressBar.style.width = "0%";
 
     const formData = new FormData();
+    // Run as a background job so long conversions don't hold the request open
+    formData.append('job', 'true');
 
     if (currentTool === 'merge' || currentTool === 'convert') {
         files.forEach(file => formData.append('files', file));
@@ -667,7 +689,7 @@ async function uploadAndConvert(files) {
 
         const xhr = new XMLHttpRequest();
 
-        const response = await new Promise((resolve, reject) => {
+        let response = await new Promise((resolve, reject) => {
             let endpoint = config.endpoint;
             if (currentTool === 'convert' && selectedTargetFormat === 'jpg') {
                 endpoint = '/convert/jpg/';
@@ -690,6 +712,10 @@ async function uploadAndConvert(files) {
             xhr.send(formData);
         });
 
+        if (response.job_id) {
+            response = await waitForJob(response.status_url, t);
+        }
+
         // Conversion done
         progressContainer.classList.remove('converting');
         progressBar.style.width = '100%';
@@ -710,6 +736,28 @@ async function uploadAndConvert(files) {
     }
 }
 
+async function waitForJob(statusUrl, t) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        let res;
+        try {
+            res = await fetch(statusUrl);
+        } catch (e) {
+            throw new Error(t.err_network || 'Ağ hatası oluştu. Sunucuya bağlanılamadı.');
+        }
+        if (!res.ok) {
+            throw new Error(t.err_unknown || "Bilinmeyen Hata");
+        }
+        const job = await res.json();
+        if (job.status === 'done') {
+            return job;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || t.err_unknown || "Bilinmeyen Hata");
+        }
+    }
+}
+
 function showResult(url) {
     progressContainer.classList.add('hidden');
     resultContainer.classList.remove('hidden');
@@ -0,0 +1,110 @@
+import json
+import sqlite3
+
+import pytest
+
+from scripts import job_queue
+from scripts.job_queue import (
+    init_queue, enqueue_job, claim_next_job, complete_job, fail_job, get_job, requeue_orphaned_jobs,
+    MAX_JOB_ATTEMPTS,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "state" / "jobs.db")
+    init_queue(path)
+    return path
+
+
+def _row(db_path, job_id):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_claim_returns_oldest_job_and_counts_the_attempt(db_path):
+    first = enqueue_job(db_path, "rotate", {"input_path": "a.pdf"})
+    second = enqueue_job(db_path, "rotate", {"input_path": "b.pdf"})
+
+    job = claim_next_job(db_path)
+    assert job["id"] == first
+    assert job["params"] == {"input_path": "a.pdf"}
+    assert get_job(db_path, first)["status"] == "running"
+    assert _row(db_path, first)["attempts"] == 1
+
+    assert claim_next_job(db_path)["id"] == second
+    assert claim_next_job(db_path) is None
+
+
+def test_password_is_kept_out_of_params_and_wiped_when_the_job_finishes(db_path):
+    job_id = enqueue_job(db_path, "protect", {"input_path": "a.pdf", "password": "hunter2"})
+
+    row = _row(db_path, job_id)
+    assert "password" not in json.loads(row["params"])
+    assert "hunter2" not in row["params"]
+    assert json.loads(row["secrets"]) == {"password": "hunter2"}
+
+    # The worker still gets the full params
+    assert claim_next_job(db_path)["params"] == {"input_path": "a.pdf", "password": "hunter2"}
+
+    complete_job(db_path, job_id, {"download_url": "/download/x"})
+    assert _row(db_path, job_id)["secrets"] is None
+    assert get_job(db_path, job_id)["result"] == {"download_url": "/download/x"}
+
+
+def test_failed_job_has_its_secrets_wiped(db_path):
+    job_id = enqueue_job(db_path, "unlock", {"input_path": "a.pdf", "password": "hunter2"})
+    claim_next_job(db_path)
+
+    fail_job(db_path, job_id, "wrong password")
+    job = get_job(db_path, job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "wrong password"
+    assert _row(db_path, job_id)["secrets"] is None
+
+
+def test_orphaned_job_is_requeued_until_the_attempt_cap(db_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "_pid_alive", lambda pid: False)
+    job_id = enqueue_job(db_path, "protect", {"input_path": "a.pdf", "password": "hunter2"})
+
+    for attempt in range(1, MAX_JOB_ATTEMPTS):
+        assert claim_next_job(db_path)["id"] == job_id
+        assert requeue_orphaned_jobs(db_path) == 1
+        assert get_job(db_path, job_id)["status"] == "queued"
+        assert _row(db_path, job_id)["attempts"] == attempt
+
+    # The last allowed attempt dies too: the job is failed instead of requeued
+    claim_next_job(db_path)
+    assert requeue_orphaned_jobs(db_path) == 0
+    job = get_job(db_path, job_id)
+    assert job["status"] == "failed"
+    assert job["error"]
+    assert _row(db_path, job_id)["secrets"] is None
+    assert claim_next_job(db_path) is None
+
+
+def test_job_of_a_live_worker_is_left_running(db_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "_pid_alive", lambda pid: True)
+    job_id = enqueue_job(db_path, "rotate", {"input_path": "a.pdf"})
+    claim_next_job(db_path)
+
+    assert requeue_orphaned_jobs(db_path) == 0
+    assert get_job(db_path, job_id)["status"] == "running"
+
+
+def test_init_queue_adds_missing_columns_to_an_old_table(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, operation TEXT NOT NULL, params TEXT NOT NULL, "
+                 "status TEXT NOT NULL, result TEXT, error TEXT, progress TEXT, worker_pid INTEGER, "
+                 "created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+    conn.close()
+
+    init_queue(path)
+    job_id = enqueue_job(path, "protect", {"password": "x"})
+    assert claim_next_job(path)["params"] == {"password": "x"}
+    assert _row(path, job_id)["attempts"] == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from scripts.page_ranges import parse_page_range, page_runs, page_groups
+
+
+@pytest.mark.parametrize("spec, expected", [
+    (None, [0, 1, 2, 3, 4]),
+    ("", [0, 1, 2, 3, 4]),
+    (" All ", [0, 1, 2, 3, 4]),
+    ("3", [2]),
+    ("2-4", [1, 2, 3]),
+    ("1, 4, 2-3", [0, 3, 1, 2]),
+    ("1-3,2-4", [0, 1, 2, 3]),  # repeated pages are kept once, in first-seen order
+])
+def test_parse_page_range(spec, expected):
+    assert parse_page_range(spec, 5) == expected
+
+
+@pytest.mark.parametrize("spec", ["0", "6", "4-2", "1-6", "a", "-2", "1,,2"])
+def test_parse_page_range_rejects_malformed_or_out_of_range_specs(spec):
+    with pytest.raises(ValueError):
+        parse_page_range(spec, 5)
+
+
+def test_page_runs():
+    assert page_runs([0, 1, 2, 5, 6, 9]) == [(0, 2), (5, 6), (9, 9)]
+    assert page_runs([3, 2]) == [(3, 3), (2, 2)]
+    assert page_runs([]) == []
+
+
+def test_page_groups_pages_mode():
+    assert page_groups(3, "pages") == [[0], [1], [2]]
+
+
+def test_page_groups_ranges_mode():
+    assert page_groups(6, "ranges", ranges="1-2; 4,6 ;") == [[0, 1], [3, 5]]
+
+
+def test_page_groups_ranges_mode_rejects_a_repeated_range():
+    with pytest.raises(ValueError):
+        page_groups(6, "ranges", ranges="1-2;1,2")
+
+
+def test_page_groups_every_mode_keeps_the_remainder():
+    assert page_groups(5, "every", every=2) == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.parametrize("mode, kwargs", [("every", {"every": 0}), ("every", {}), ("chapters", {})])
+def test_page_groups_rejects_invalid_modes(mode, kwargs):
+    with pytest.raises(ValueError):
+        page_groups(5, mode, **kwargs)
@@ -0,0 +1,89 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+
+from scripts.pdf_split import split_pdf
+from scripts import pdf_backend_pypdf2
+
+
+def _make_pdf(path, page_count, image_bytes=0):
+    """
+    A PDF whose pages carry their 1-based number as text and, with image_bytes, a distinct
+    incompressible image each.
+    """
+    with fitz.open() as doc:
+        for i in range(page_count):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {i + 1}")
+            if image_bytes:
+                side = int((image_bytes / 3) ** 0.5)
+                pixmap = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), 0)
+                page.insert_image(fitz.Rect(72, 100, 272, 300), pixmap=pixmap)
+        doc.save(str(path))
+    return str(path)
+
+
+def _page_labels(path):
+    with fitz.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def test_pages_mode_writes_one_file_per_page(tmp_path):
+    src = _make_pdf(tmp_path / "in.pdf", 3)
+    outputs = split_pdf(src, str(tmp_path), "doc")
+
+    assert [os.path.basename(p) for p in outputs] == ["doc_page_1.pdf", "doc_page_2.pdf", "doc_page_3.pdf"]
+    assert [_page_labels(p) for p in outputs] == [["Page 1"], ["Page 2"], ["Page 3"]]
+
+
+def test_ranges_mode_names_contiguous_and_scattered_groups(tmp_path):
+    src = _make_pdf(tmp_path / "in.pdf", 6)
+    outputs = split_pdf(src, str(tmp_path), "doc", mode="ranges", ranges="1-2;4,6;5")
+
+    assert [os.path.basename(p) for p in outputs] == ["doc_pages_1-2.pdf", "doc_part_2.pdf", "doc_page_5.pdf"]
+    assert [_page_labels(p) for p in outputs] == [["Page 1", "Page 2"], ["Page 4", "Page 6"], ["Page 5"]]
+
+
+def test_every_mode_puts_the_remainder_in_the_last_file(tmp_path):
+    src = _make_pdf(tmp_path / "in.pdf", 5)
+    outputs = split_pdf(src, str(tmp_path), "doc", mode="every", every=2)
+
+    assert [os.path.basename(p) for p in outputs] == ["doc_pages_1-2.pdf", "doc_pages_3-4.pdf", "doc_page_5.pdf"]
+
+
+def test_size_mode_keeps_every_page_in_order_within_the_limit(tmp_path):
+    src = _make_pdf(tmp_path / "in.pdf", 8, image_bytes=30_000)
+    max_bytes = 80_000
+    outputs = split_pdf(src, str(tmp_path), "doc", mode="size", max_bytes=max_bytes)
+
+    assert len(outputs) > 1
+    labels = [label for path in outputs for label in _page_labels(path)]
+    assert labels == [f"Page {i}" for i in range(1, 9)]
+    for path in outputs:
+        with fitz.open(path) as part:
+            assert len(part) == 1 or os.path.getsize(path) <= max_bytes
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"mode": "size"},
+    {"mode": "ranges", "ranges": "2-9"},
+    {"mode": "ranges", "ranges": "1;1"},
+    {"mode": "every", "every": 0},
+])
+def test_invalid_split_requests_raise_value_error(tmp_path, kwargs):
+    src = _make_pdf(tmp_path / "in.pdf", 3)
+    with pytest.raises(ValueError):
+        split_pdf(src, str(tmp_path), "doc", **kwargs)
+
+
+def test_pypdf2_backend_uses_the_same_file_names(tmp_path):
+    src = _make_pdf(tmp_path / "in.pdf", 6)
+    pymupdf_dir, pypdf2_dir = tmp_path / "pymupdf", tmp_path / "pypdf2"
+    pymupdf_dir.mkdir()
+    pypdf2_dir.mkdir()
+
+    expected = split_pdf(src, str(pymupdf_dir), "doc", mode="ranges", ranges="1-3;2,5;6")
+    actual = pdf_backend_pypdf2.split_pdf(src, str(pypdf2_dir), "doc", mode="ranges", ranges="1-3;2,5;6")
+
+    assert [os.path.basename(p) for p in actual] == [os.path.basename(p) for p in expected]
@@ -0,0 +1,120 @@
+import os
+import time
+
+import pytest
+
+from scripts.result_cache import ResultCache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"), max_bytes=1024 * 1024, ttl_seconds=3600)
+
+
+def _write(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_cache_key_depends_on_inputs_operation_and_params():
+    key = make_cache_key(["abc"], "compress", {"level": "high"})
+    assert key == make_cache_key(["abc"], "compress", {"level": "high"})
+    assert key != make_cache_key(["abd"], "compress", {"level": "high"})
+    assert key != make_cache_key(["abc"], "rotate", {"level": "high"})
+    assert key != make_cache_key(["abc"], "compress", {"level": "low"})
+    assert make_cache_key(["a", "b"], "merge") != make_cache_key(["b", "a"], "merge")
+
+
+def test_get_copies_a_stored_result(cache, tmp_path):
+    src = _write(tmp_path / "out.pdf", b"converted")
+    cache.put("k", src)
+
+    dest = str(tmp_path / "again.pdf")
+    assert cache.get("k", dest)
+    assert _read(dest) == b"converted"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 0, 1)
+
+
+def test_miss_is_counted(cache, tmp_path):
+    assert not cache.get("missing", str(tmp_path / "x.pdf"))
+    assert not os.path.exists(tmp_path / "x.pdf")
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_are_independent_copies(cache, tmp_path):
+    src = _write(tmp_path / "out.pdf", b"original")
+    cache.put("k", src)
+
+    # A converter overwriting its output in place must not change the cache entry
+    _write(src, b"overwritten")
+    dest = str(tmp_path / "served.pdf")
+    assert cache.get("k", dest)
+    assert _read(dest) == b"original"
+
+    # Nor may changing a served copy
+    _write(dest, b"edited")
+    assert cache.get("k", str(tmp_path / "served_again.pdf"))
+    assert _read(tmp_path / "served_again.pdf") == b"original"
+
+
+def test_get_replaces_an_existing_destination(cache, tmp_path):
+    cache.put("k", _write(tmp_path / "out.pdf", b"cached"))
+    dest = _write(tmp_path / "dest.pdf", b"stale")
+
+    assert cache.get("k", dest)
+    assert _read(dest) == b"cached"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=1024 * 1024, ttl_seconds=0)
+    cache.put("k", _write(tmp_path / "out.pdf", b"converted"))
+    time.sleep(0.01)
+
+    assert not cache.get("k", str(tmp_path / "dest.pdf"))
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_cap(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=250, ttl_seconds=3600)
+    for key in ("a", "b"):
+        cache.put(key, _write(tmp_path / f"{key}.bin", key.encode() * 100))
+        time.sleep(0.01)
+    # Touch "a" so "b" is the least recently used when "c" pushes the total over the cap
+    assert cache.get("a", str(tmp_path / "a_copy.bin"))
+    time.sleep(0.01)
+    cache.put("c", _write(tmp_path / "c.bin", b"c" * 100))
+
+    assert cache.locate("a", record=False) is not None
+    assert cache.locate("b", record=False) is None
+    assert cache.locate("c", record=False) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 250
+
+
+def test_entry_deleted_from_disk_is_a_miss(cache, tmp_path):
+    cache.put("k", _write(tmp_path / "out.pdf", b"converted"))
+    os.remove(cache.locate("k", record=False))
+
+    assert not cache.get("k", str(tmp_path / "dest.pdf"))
+    assert cache.stats()["misses"] == 1
+
+
+def test_put_bytes_and_locate(cache):
+    cache.put_bytes("thumb", b"webp-bytes", ".webp")
+
+    path = cache.locate("thumb")
+    assert path.endswith("thumb.webp")
+    assert _read(path) == b"webp-bytes"
+    assert cache.locate("other") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)